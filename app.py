@@ -1,7 +1,7 @@
 import streamlit as st
 import bcrypt
 import src.utils as utils
-from src.user import get_users
+from src.user import get_user_by_name, get_role_permissions
 
 st.set_page_config(page_title="AP Collections", page_icon="🌴")
 
@@ -59,7 +59,7 @@ if "authenticated" not in st.session_state:
 if "role_name" not in st.session_state:
     st.session_state["role_name"] = None
 
-def check_credentials(users, username, password):
+def check_credentials(username, password):
     result = {
         "valid": False,
         "user_name": None,
@@ -67,13 +67,19 @@ def check_credentials(users, username, password):
         "permissions": None
     }
 
-    for _, row in users.iterrows():
-        if row["user_name"] == username and bcrypt.checkpw(password.encode("utf-8"), row["password"].encode("utf-8")):
+    users = get_user_by_name(username)
+    if users.empty:
+        return result
+
+    user = users.iloc[0]
+    if bcrypt.checkpw(password.encode("utf-8"), user["password"].encode("utf-8")):
+        roles = get_role_permissions()
+        role = roles[roles["role_id"] == user["role_id"]]
+        if not role.empty:
             result["valid"] = True
-            result["user_name"] = row["user_name"]
-            result["role_name"] = row["role_name"]
-            result["permissions"] = row["permissions"]
-            break
+            result["user_name"] = user["user_name"]
+            result["role_name"] = role.iloc[0]["role_name"]
+            result["permissions"] = role.iloc[0]["permissions"]
 
     return result
 
@@ -100,8 +106,8 @@ def show_sidebar():
     )
 
 
-# PostgreSQL connection
-st.session_state["postgresql"] = utils.get_postgresql_connection()
+# PostgreSQL connection (process-wide, shared by all sessions)
+utils.get_postgresql_connection()
 
 
 # About Us
@@ -165,8 +171,6 @@ pages_report = {
     "Income Statement": income_statement_pg
 }
 
-users = get_users()
-
 if st.session_state["authenticated"] == False:
     # Login Form
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -187,7 +191,7 @@ if st.session_state["authenticated"] == False:
             submitted = st.form_submit_button("🚀 Login")
 
             if submitted:
-                result = check_credentials(users, username, password)
+                result = check_credentials(username, password)
                 if result["valid"]:
                     # save in session state
                     st.session_state["authenticated"] = True
@@ -1,10 +1,11 @@
 import streamlit as st
 from datetime import datetime
-from src.expense_type import get_expense_types
+from src.expense_type import get_expense_type_lookup
 import src.expense as controller
 
 def expense_form(is_edit: bool, submit_callback=None):
-    expense_types = get_expense_types()
+    # process-wide cached lookup, no query on reruns
+    expense_types = get_expense_type_lookup()
     
     st.subheader("🧾 Expense Info")
 
@@ -16,12 +17,12 @@ def expense_form(is_edit: bool, submit_callback=None):
 
     expense_type_name = st.selectbox(
         label="Expense Type",
-        options=expense_types["name"].tolist(),
+        options=expense_types["options"],
         accept_new_options=False,
-        index=expense_types["name"].tolist().index(st.session_state["edit_expense_type_name"]) if is_edit else None
+        index=expense_types["options"].index(st.session_state["edit_expense_type_name"]) if is_edit else None
     )
     if expense_type_name:
-        expense_type_id = int(expense_types[expense_types["name"] == expense_type_name].iloc[0]["id"])
+        expense_type_id = expense_types["id_by_name"][expense_type_name]
     
     description = st.text_area(
         label="Description",
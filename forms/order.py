@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
 from forms import customer, search_customer
-from src.payment_type import get_payment_types
-from src.stock_category import get_stock_categories
+from src.payment_type import get_payment_type_lookup
+from src.stock_category import get_stock_category_lookup
 from src.customer import get_customer_by_id
 import src.order as controller
 
@@ -27,12 +27,51 @@ def new_customer_submit_callback(data=None):
             st.session_state["search_state_region"] = df.iloc[0]["state_region"]
             st.rerun()
 
-def construct_order_no(dt: date, customer_serial_no: str):
-    return f"{dt.strftime('%Y%m%d')}-{datetime.now().strftime('%H%M%S')}-{customer_serial_no}"
+# edits in the items table rerun only this fragment; "Update Item" reruns the whole form
+# so the totals and paid amount pick up the new items
+@st.fragment
+def order_items_editor(is_edit: bool):
+    st.subheader("📋 Order Items")
+    if ("order_items" in st.session_state and st.session_state["order_items"]) or ("edit_order_items" in st.session_state and st.session_state["edit_order_items"]):
+        with st.container():
+            df = st.data_editor(
+                data=st.session_state["order_items"] if not is_edit else st.session_state["edit_order_items"],
+                column_config={
+                    "id": None,
+                    "stock_category_id": st.column_config.Column(label="Stock Category ID", disabled=True),
+                    "stock_category_name": st.column_config.Column(label="Stock Category", disabled=True),
+                    "description": st.column_config.TextColumn(label="Description", max_chars=100),
+                    "quantity": st.column_config.NumberColumn(label="Quantity", step="1"),
+                    "price": st.column_config.NumberColumn(label="Price", step="1000"),
+                    "extra": st.column_config.NumberColumn(label="Extra", step="1000"),
+                    "amount": st.column_config.NumberColumn(label="Amount", step="1000")
+                },
+                use_container_width=True,
+                key="order_items_data_editor",
+                num_rows="dynamic"
+            )
+
+            _, _, btn_col = st.columns([6, 1, 2])
+            with btn_col:
+                if st.button("🔄 Update Item"):
+                    # remove items where stock_category_name is None
+                    df = [i for i in df if i.get("stock_category_name") is not None]
+
+                    for i in df:
+                        i["amount"] = i["quantity"] * (i["price"] + i["extra"])
+
+                    if is_edit:
+                        st.session_state["edit_order_items"] = df
+                    else:
+                        st.session_state["order_items"] = df
+                    st.rerun()
+    else:
+        st.info("No items added yet.")
 
 def order_form(is_edit: bool, submit_callback=None):
-    payment_types = get_payment_types()
-    stock_categories = get_stock_categories()
+    # process-wide cached lookups, no queries on reruns
+    payment_types = get_payment_type_lookup()
+    stock_categories = get_stock_category_lookup()
 
     col1, col2 = st.columns(2)
 
@@ -126,11 +165,11 @@ def order_form(is_edit: bool, submit_callback=None):
         with st.form(key="add_new_item_form" if is_edit else "edit_item_form", clear_on_submit=True):
             stock_category_name = st.selectbox(
                 label="Stock Category",
-                options=stock_categories["name"].tolist(),
+                options=stock_categories["options"],
                 accept_new_options=False
             )
             if stock_category_name:
-                stock_category_id = int(stock_categories[stock_categories["name"] == stock_category_name].iloc[0]["id"])
+                stock_category_id = stock_categories["id_by_name"][stock_category_name]
 
             description = st.text_input("Description", max_chars=100)
             quantity = st.number_input("Quantity", min_value=1, value=1, format="%d")
@@ -168,41 +207,7 @@ def order_form(is_edit: bool, submit_callback=None):
     )
 
     # ----- Items List -----
-    st.subheader("📋 Order Items")
-    if ("order_items" in st.session_state and st.session_state["order_items"]) or ("edit_order_items" in st.session_state and st.session_state["edit_order_items"]):
-        with st.container():
-            df = st.data_editor(
-                data=st.session_state["order_items"] if not is_edit else st.session_state["edit_order_items"],
-                column_config={
-                    "stock_category_id": st.column_config.Column(label="Stock Category ID", disabled=True),
-                    "stock_category_name": st.column_config.Column(label="Stock Category", disabled=True),
-                    "description": st.column_config.TextColumn(label="Description", max_chars=100),
-                    "quantity": st.column_config.NumberColumn(label="Quantity", step="1"),
-                    "price": st.column_config.NumberColumn(label="Price", step="1000"),
-                    "extra": st.column_config.NumberColumn(label="Extra", step="1000"),
-                    "amount": st.column_config.NumberColumn(label="Amount", step="1000")
-                },
-                use_container_width=True,
-                key="order_items_data_editor",
-                num_rows="dynamic"
-            )
-
-            _, _, btn_col = st.columns([6, 1, 2])
-            with btn_col:
-                if st.button("🔄 Update Item"):
-                    # remove items where stock_category_name is None
-                    df = [i for i in df if i.get("stock_category_name") is not None]
-
-                    for i in df:
-                        i["amount"] = i["quantity"] * (i["price"] + i["extra"])
-
-                    if is_edit:
-                        st.session_state["edit_order_items"] = df
-                    else:
-                        st.session_state["order_items"] = df
-                    st.rerun()
-    else:
-        st.info("No items added yet.")
+    order_items_editor(is_edit)
 
     ttl_quantity, ttl_amount = 0, 0
     if is_edit and "edit_order_items" in st.session_state:
@@ -233,12 +238,12 @@ def order_form(is_edit: bool, submit_callback=None):
         
     payment_type_name = st.selectbox(
         label="Payment Type",
-        options=payment_types["name"].tolist(),
+        options=payment_types["options"],
         accept_new_options=False,
-        index=payment_types["name"].tolist().index(st.session_state["edit_payment_type_name"]) if is_edit else payment_types["name"].tolist().index("KBZ Pay")
+        index=payment_types["options"].index(st.session_state["edit_payment_type_name"]) if is_edit else payment_types["options"].index("KBZ Pay")
     )
     if payment_type_name:
-        payment_type_id = int(payment_types[payment_types["name"] == payment_type_name].iloc[0]["id"])
+        payment_type_id = payment_types["id_by_name"][payment_type_name]
 
     # Save
     if st.button("✅ Confirm Order" if not is_edit else "💾 Save Order"):
@@ -256,7 +261,8 @@ def order_form(is_edit: bool, submit_callback=None):
             order = {
                 "id": st.session_state["edit_id"] if is_edit else None,
                 "date": dt,
-                "order_no": construct_order_no(dt, serial_no) if not is_edit else edit_order_no,
+                # new orders get their number from src.order.add_order
+                "order_no": edit_order_no if is_edit else None,
                 "customer_id": st.session_state["search_id"],
                 "ttl_quantity": ttl_quantity,
                 "ttl_amount": ttl_amount,
@@ -2,48 +2,49 @@ import streamlit as st
 import pandas as pd
 import src.customer as controller
 
+def customer_label(customer: pd.Series, is_selected: bool):
+    return (
+        f"{'✔️' if is_selected else ''}{customer['serial_no']} | {customer['name']} | {customer['phone']}"
+        f" — {customer['city']}, {customer['state_region']}"
+    )
+
 @st.dialog("### 🔎 Search Customer", width="large")
 def search_customer_modal(sel_id: int=None, sel_serial_no: str=None, sel_name: str=None, sel_phone: str=None, sel_delivery_address: str=None, sel_city: str=None, sel_state_region: str=None):
     with st.container():
         search_term = st.text_input(
             label="Search",
-            max_chars=5
+            max_chars=5,
+            placeholder="Serial No., name or phone"
         )
 
-        limit = 5 if search_term == "" else None
+        # prefix typeahead capped at controller.typeahead_limit; latest buyers before anything is typed
+        if search_term.strip():
+            customers = controller.typeahead_customers(search_term)
+        else:
+            customers = controller.get_recent_customers()
 
-        customers = controller.get_customers(search_term, limit)
         if not customers.empty:
-            for _, customer in customers.iterrows():
-                is_selected = sel_id is not None and customer["id"] == sel_id
-                # serial_no, name, phone
-                st.markdown(
-                    f"""
-                    {'✔️' + customer['serial_no'] if is_selected else customer['serial_no']} |
-                    {customer['name'] if is_selected else customer['name']} |
-                    {customer['phone'] if is_selected else customer['phone']}
-                    """
-                )
-                # delivery_address
-                st.markdown(customer['delivery_address'] if is_selected else customer['delivery_address'])
-                # city, state_region
-                st.markdown(
-                    f"""
-                    {customer['city'] if is_selected else customer['city']} |
-                    {customer['state_region'] if is_selected else customer['state_region']}
-                    """
-                )
-                
-                if st.button("👉 Select", key=f"select_{customer['id']}"):
-                    st.session_state["search_id"] = customer["id"]
-                    st.session_state["search_serial_no"] = customer["serial_no"]
-                    st.session_state["search_name"] = customer["name"]
-                    st.session_state["search_phone"] = customer["phone"]
-                    st.session_state["search_delivery_address"] = customer["delivery_address"]
-                    st.session_state["search_city"] = customer["city"]
-                    st.session_state["search_state_region"] = customer["state_region"]
-                    st.rerun()
+            customers = customers.reset_index(drop=True)
+            selected = customers.index[customers["id"] == sel_id].tolist() if sel_id is not None else []
+
+            idx = st.radio(
+                label="Customer",
+                options=customers.index.tolist(),
+                index=selected[0] if selected else 0,
+                format_func=lambda i: customer_label(customers.iloc[i], customers.iloc[i]["id"] == sel_id),
+                label_visibility="collapsed"
+            )
+            customer = customers.iloc[idx]
+            st.markdown(customer["delivery_address"])
 
-                st.markdown("-----")
+            if st.button("👉 Select", key="select_customer"):
+                st.session_state["search_id"] = int(customer["id"])
+                st.session_state["search_serial_no"] = customer["serial_no"]
+                st.session_state["search_name"] = customer["name"]
+                st.session_state["search_phone"] = customer["phone"]
+                st.session_state["search_delivery_address"] = customer["delivery_address"]
+                st.session_state["search_city"] = customer["city"]
+                st.session_state["search_state_region"] = customer["state_region"]
+                st.rerun()
         else:
             st.warning("No data available 📭")
@@ -5,7 +5,7 @@ import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import calendar
 import src.utils as utils
-from src.report import get_orders, get_expenses
+from src.report import get_monthly_income, get_monthly_expenses
 
 st.set_page_config(layout="wide")
 
@@ -26,16 +26,13 @@ if filtered_year:
     from_date = datetime.strptime(f"{filtered_year}-01-01 00:00:00", "%Y-%m-%d %H:%M:%S")
     to_date = datetime.strptime(f"{filtered_year}-12-31 23:59:59", "%Y-%m-%d %H:%M:%S")
     
-    orders_data = get_orders(from_date, to_date)
-    orders_data.drop_duplicates(subset=["order_no"], inplace=True)
-    orders_data["date"] = pd.to_datetime(orders_data["date"])
-    orders_data["month"] = orders_data["date"].dt.month
-    orders_data = orders_data.groupby(["month", "payment_type_name"], as_index=False)["paid_amount"].sum()
-    
-    expenses_data = get_expenses(from_date, to_date)
-    expenses_data["date"] = pd.to_datetime(expenses_data["date"])
-    expenses_data["month"] = expenses_data["date"].dt.month
-    expenses_data = expenses_data.groupby(["month", "expense_type_name"], as_index=False)["amount"].sum()
+    # month x payment type / month x expense type totals, grouped by Postgres
+    orders_data = get_monthly_income(from_date, to_date)
+    expenses_data = get_monthly_expenses(from_date, to_date)
+
+    # split once by month instead of filtering the frames in every month_block()
+    orders_by_month = dict(tuple(orders_data.groupby("month")))
+    expenses_by_month = dict(tuple(expenses_data.groupby("month")))
 
 
 month_names = {
@@ -55,8 +52,8 @@ annual_expense = expenses_data["amount"].sum() if not expenses_data.empty else 0
 annual_net = annual_income - annual_expense
 
 def month_block(month):
-    inc = orders_data[orders_data["month"] == month]
-    exp = expenses_data[expenses_data["month"] == month]
+    inc = orders_by_month.get(month, orders_data.iloc[0:0])
+    exp = expenses_by_month.get(month, expenses_data.iloc[0:0])
     ttl_inc = inc["paid_amount"].sum()
     ttl_exp = exp["amount"].sum()
     net = ttl_inc - ttl_exp
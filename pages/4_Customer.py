@@ -33,17 +33,20 @@ if "last_filter_value" not in st.session_state:
 # Search
 with st.spinner("Searching ..."):
     search_term = st.text_input("🔍 Search Customer")
-    data = controller.get_customers(search_term)
 
     # reset pagination if filter changes
     if (search_term != st.session_state["last_filter_value"]):
         st.session_state["page"] = 1
     st.session_state["last_filter_value"] = search_term
 
+    total_customers = controller.count_customers(search_term)
+
     st.write("### Customers")
-    if data.shape[0]:
+    if total_customers:
         # pagination
-        total_pages = (len(data) - 1) // trans_per_page + 1
+        total_pages = (total_customers - 1) // trans_per_page + 1
+        if st.session_state["page"] > total_pages:
+            st.session_state["page"] = total_pages
         col1, col2, col3 = st.columns([1, 3, 1], vertical_alignment="center")
         with col1:
             if st.button("⬅ Prev", use_container_width=True) and st.session_state["page"] > 1:
@@ -57,9 +60,8 @@ with st.spinner("Searching ..."):
                 unsafe_allow_html=True
             )
 
-        start = (st.session_state["page"] - 1) * trans_per_page
-        end = start + trans_per_page
-        paginated_data = data[start : end]
+        # fetch only the current page
+        paginated_data = controller.get_customers_page(search_term, page=st.session_state["page"], page_size=trans_per_page)
 
         for idx, row in paginated_data.iterrows():
             cols = st.columns([1, 1, 1, 1, 1, 1])
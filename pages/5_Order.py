@@ -4,6 +4,7 @@ from datetime import datetime
 import src.order as controller
 import forms.order as order_form
 import src.utils as utils
+import src.receipt as receipt
 from streamlit.components.v1 import html
 
 st.set_page_config(layout="centered")
@@ -30,6 +31,8 @@ if "show_form" not in st.session_state:
 trans_per_page = 5
 if "page" not in st.session_state:
     st.session_state["page"] = 1
+if "order_page_cursors" not in st.session_state:
+    st.session_state["order_page_cursors"] = {1: None}
 if "last_filter_mode" not in st.session_state:
     st.session_state["last_filter_mode"] = None
 if "last_filter_value" not in st.session_state:
@@ -37,40 +40,50 @@ if "last_filter_value" not in st.session_state:
 
 # Search
 with st.spinner("Searching ..."):
-    data, data_items = pd.DataFrame(), pd.DataFrame()
+    items_by_order = {}
+    total_orders = 0
     filter_mode = st.radio(label="🔎 Search Order", options=["Date", "Customer"], horizontal=True)
     if filter_mode == "Date":
         dt = st.date_input(label="Date", label_visibility="collapsed", value=datetime.today(), format="YYYY-MM-DD", key="search_date")
         filter_value = str(dt)
-        if dt:
-            data = controller.get_orders(dt=dt, search_term=None)
-            if data is not None and len(data["id"].tolist()):
-                data_items = controller.get_order_items(dt=dt, order_ids=data["id"].tolist())
+        search_term = None
 
     elif filter_mode == "Customer":
         search_term = st.text_input(label="Search Order", label_visibility="collapsed")
         filter_value = search_term
-        if search_term:
-            data = controller.get_orders(dt=None, search_term=search_term)
-            if data is not None and len(data["id"].tolist()):
-                data_items = controller.get_order_items(dt=None, order_ids=data["id"].tolist())
+        dt = None
 
     # reset pagination if filter changes
     if (filter_mode != st.session_state["last_filter_mode"] or filter_value != st.session_state["last_filter_value"]):
         st.session_state["page"] = 1
+        st.session_state["order_page_cursors"] = {1: None}
     st.session_state["last_filter_mode"] = filter_mode
     st.session_state["last_filter_value"] = filter_value
+    if st.session_state["page"] not in st.session_state["order_page_cursors"]:
+        st.session_state["page"] = 1
+
+    if dt or search_term:
+        total_orders = controller.count_orders(dt=dt, search_term=search_term)
 
     st.write("### Orders")
-    if data.shape[0]:
+    if total_orders:
+        # every receipt of the date in one print job
+        if filter_mode == "Date" and st.button("🖨️ Print All Receipts", disabled=not receipt_permission):
+            day_orders, day_items = controller.get_orders_with_items(dt=dt)
+            receipts_html = receipt.build_receipts_html([
+                (order, day_items[int(order["id"])].to_dict(orient="records"))
+                for _, order in day_orders.iterrows()
+            ])
+            html(receipts_html, height=0, width=0)
+
         # pagination
-        total_pages = (len(data) - 1) // trans_per_page + 1
+        total_pages = (total_orders - 1) // trans_per_page + 1
         col1, col2, col3 = st.columns([1, 3, 1], vertical_alignment="center")
         with col1:
             if st.button("⬅ Prev", use_container_width=True) and st.session_state["page"] > 1:
                 st.session_state["page"] = st.session_state["page"] - 1
         with col3:
-            if st.button("Next ➡", use_container_width=True) and st.session_state["page"] < total_pages:
+            if st.button("Next ➡", use_container_width=True) and st.session_state["page"] < total_pages and (st.session_state["page"] + 1) in st.session_state["order_page_cursors"]:
                 st.session_state["page"] = st.session_state["page"] + 1  
         with col2:
             st.markdown(
@@ -78,12 +91,19 @@ with st.spinner("Searching ..."):
                 unsafe_allow_html=True
             )
 
-        start = (st.session_state["page"] - 1) * trans_per_page
-        end = start + trans_per_page
-        paginated_data = data[start : end]
+        # fetch only the current page
+        paginated_data, items_by_order = controller.get_orders_page(
+            dt=dt, 
+            search_term=search_term, 
+            page_size=trans_per_page, 
+            after=st.session_state["order_page_cursors"][st.session_state["page"]]
+        )
+        if paginated_data.shape[0]:
+            last_row = paginated_data.iloc[-1]
+            st.session_state["order_page_cursors"][st.session_state["page"] + 1] = (last_row["date"], int(last_row["id"]))
 
         for _, row in paginated_data.iterrows():
-            items = data_items[data_items["order_id"] == row["id"]]
+            items = items_by_order[int(row["id"])]
 
             col1, col2 = st.columns([3, 1], vertical_alignment="center")
             with col1:
@@ -125,7 +145,7 @@ with st.spinner("Searching ..."):
                         st.session_state["edit_measurement"] = row["measurement"]
                         st.session_state["edit_is_delivered"] = row["is_delivered"]
                         st.session_state["edit_delivery_date"] = row["delivery_date"]
-                        st.session_state["edit_order_items"] = items.drop(columns=["id", "order_id"]).to_dict(orient="records")
+                        st.session_state["edit_order_items"] = items.drop(columns=["order_id"]).to_dict(orient="records")
 
                 # Delete Button
                 with col_delete:
@@ -140,7 +160,7 @@ with st.spinner("Searching ..."):
                 # Receipt Button
                 with col_receipt:
                     if st.button(label="🖨️", help="Print Receipt", key=f"receipt_{row['id']}", use_container_width=True, disabled=not receipt_permission):
-                        receipt_html = utils.build_receipt_html(order=row.to_dict(), items=items.to_dict(orient="records"))
+                        receipt_html = receipt.build_receipt_html(order=row.to_dict(), items=items.to_dict(orient="records"))
                         html(receipt_html, height=0, width=0)
 
             with st.expander(label="📋 Items"):
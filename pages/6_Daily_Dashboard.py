@@ -3,7 +3,8 @@ import numpy as np
 import plotly.express as px
 from datetime import datetime, date, timedelta
 import src.utils as utils
-from src.report import get_orders
+from src.report import get_orders, get_daily_sales_summary, load_concurrently
+from src.kpi import compute_kpis
 
 st.set_page_config(layout="wide")
 
@@ -18,54 +19,60 @@ filtered_date = st.sidebar.date_input("Date", date.today())
 if filtered_date:
     from_date = datetime.strptime(f"{filtered_date} 00:00:00", "%Y-%m-%d %H:%M:%S")
     to_date = datetime.strptime(f"{filtered_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
-    orders_data = get_orders(from_date, to_date)
     
     prev_date = filtered_date - timedelta(days=1)
-    from_date = datetime.strptime(f"{prev_date} 00:00:00", "%Y-%m-%d %H:%M:%S")
-    to_date = datetime.strptime(f"{prev_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
-    prev_data = get_orders(from_date, to_date)
+    prev_from_date = datetime.strptime(f"{prev_date} 00:00:00", "%Y-%m-%d %H:%M:%S")
+    prev_to_date = datetime.strptime(f"{prev_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
+
+    # sales totals come from the daily sales summary; the orders are only needed for the
+    # customer breakdowns. Everything is fetched at the same time
+    loaded = load_concurrently({
+        "orders": (get_orders, from_date, to_date),
+        "sales": (get_daily_sales_summary, from_date, to_date),
+        "stock category sales": (get_daily_sales_summary, from_date, to_date, True),
+        "previous day sales": (get_daily_sales_summary, prev_from_date, prev_to_date)
+    })
+    failed = [name for name, res in loaded.items() if res["error"] is not None]
+    if failed:
+        st.error(f"Failed to load {', '.join(failed)} 😞")
+        st.stop()
+
+    orders_data = loaded["orders"]["data"]
+    sales_data = loaded["sales"]["data"]
+    items_data = loaded["stock category sales"]["data"]
+    prev_data = loaded["previous day sales"]["data"]
 
 
 # KPIs
 def kpi_metrics():
-    # Previous Day
-    prev_orders = prev_data["id"].nunique() if prev_data.shape[0] else 0
-    prev_quantity = prev_data["quantity"].sum() if prev_data.shape[0] else 0
-    prev_revenue = prev_data.groupby("id")["paid_amount"].first().sum() if prev_data.shape[0] else 0
-    
-    # Current Day
-    total_orders = orders_data["id"].nunique()
-    total_quantity = orders_data["quantity"].sum()
-    total_revenue = orders_data.groupby("id")["paid_amount"].first().sum()
-    total_delivery_charges = orders_data.groupby("id")["delivery_charges"].first().sum()
-    total_discount = orders_data.groupby("id")["discount"].first().sum()
+    kpis = compute_kpis(sales_data, prev_data)
 
     # Orders, Quantity, Revenue
     col1, col2, col3 = st.columns(3) 
     col1.metric(
-        "🧾 Orders", total_orders, 
-        delta=f"{utils.percentage_change(total_orders, prev_orders):.2f}%",
+        "🧾 Orders", kpis["orders"]["current"], 
+        delta=f"{kpis['orders']['delta']:.2f}%",
         border=True
     )
     col2.metric(
-        "📦 Quantity", total_quantity, 
-        delta=f"{utils.percentage_change(total_quantity, prev_quantity):.2f}%",
+        "📦 Quantity", kpis["quantity"]["current"], 
+        delta=f"{kpis['quantity']['delta']:.2f}%",
         border=True
     )
     col3.metric(
-        "💰 Revenue", f"{total_revenue:,}", 
-        delta=f"{utils.percentage_change(total_revenue, prev_revenue):.2f}%",
+        "💰 Revenue", f"{kpis['revenue']['current']:,}", 
+        delta=f"{kpis['revenue']['delta']:.2f}%",
         border=True
     )
 
     # Delivery Charges, Discount
     col1, col2, col3 = st.columns(3)
     col1.metric(
-        "🚚 Delivery Charges", f"{total_delivery_charges:,}",
+        "🚚 Delivery Charges", f"{kpis['delivery_charges']['current']:,}",
         border=True
     )
     col2.metric(
-        "➖ Discount", f"{total_discount:,}",
+        "➖ Discount", f"{kpis['discount']['current']:,}",
         border=True
     )
     
@@ -74,7 +81,7 @@ def kpi_metrics():
 
 # Quantity & Amount by Stock Category
 def quantity_and_amount_by_stock_category():
-    agg_stock_category = orders_data.groupby(["stock_category_id", "stock_category_name"]).agg({
+    agg_stock_category = items_data.groupby(["stock_category_id", "stock_category_name"]).agg({
         "quantity": "sum",
         "amount": "sum"
     }).reset_index()
@@ -124,7 +131,7 @@ def revenue_breakdown():
     col1, col2 = st.columns(2)
     with col1:
         # By Payment Type - Pie Chart
-        agg_payment_type = orders_data.drop_duplicates(subset=["id"]).groupby(["payment_type_id", "payment_type_name"]).agg({
+        agg_payment_type = sales_data.groupby(["payment_type_id", "payment_type_name"]).agg({
             "paid_amount": "sum"
         }).reset_index()
         agg_payment_type.columns = ["Payment Type ID", "Payment Type", "Paid Amount"]
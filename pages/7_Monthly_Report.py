@@ -5,7 +5,9 @@ import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import calendar
 import src.utils as utils
-from src.report import get_orders, get_expenses
+import src.figure_cache as figure_cache
+from src.report import get_daily_sales_summary, get_expenses, load_concurrently
+from src.kpi import compute_kpis
 
 st.set_page_config(layout="wide")
 
@@ -13,6 +15,10 @@ if "orders_data" in st.session_state:
     del st.session_state["orders_data"]
 if "prev_data" in st.session_state:
     del st.session_state["prev_data"]
+if "items_data" in st.session_state:
+    del st.session_state["items_data"]
+if "prev_items_data" in st.session_state:
+    del st.session_state["prev_items_data"]
 if "expenses_data" in st.session_state:
     del st.session_state["expenses_data"]
 if "prev_expenses_data" in st.session_state:
@@ -36,79 +42,88 @@ if filtered_year and filtered_month:
     last_day_of_month = calendar.monthrange(int(filtered_year), int(filtered_month))[1]
     from_date = datetime.strptime(f"{filtered_year}-{filtered_month}-01 00:00:00", "%Y-%m-%d %H:%M:%S")
     to_date = datetime.strptime(f"{filtered_year}-{filtered_month}-{last_day_of_month} 23:59:59", "%Y-%m-%d %H:%M:%S")
-    orders_data = get_orders(from_date, to_date)
-    
-    # current expenses
-    expenses_data = get_expenses(from_date, to_date)
-    expenses_data_grp = expenses_data.groupby(["expense_type_id", "expense_type_name"], as_index=False).sum("amount")
 
     # previous month
     prev_month = date(int(filtered_year), int(filtered_month), 1) - timedelta(days=1)
-    from_date = datetime.strptime(f"{prev_month.year}-{prev_month.month}-01 00:00:00", "%Y-%m-%d %H:%M:%S")
-    to_date = datetime.strptime(f"{prev_month.year}-{prev_month.month}-{prev_month.day} 23:59:59", "%Y-%m-%d %H:%M:%S")
-    prev_data = get_orders(from_date, to_date)
+    prev_from_date = datetime.strptime(f"{prev_month.year}-{prev_month.month}-01 00:00:00", "%Y-%m-%d %H:%M:%S")
+    prev_to_date = datetime.strptime(f"{prev_month.year}-{prev_month.month}-{prev_month.day} 23:59:59", "%Y-%m-%d %H:%M:%S")
+
+    # sales totals come from the daily sales summary (order-level and per stock category rows);
+    # the six datasets are independent, so they are fetched at the same time
+    loaded = load_concurrently({
+        "sales": (get_daily_sales_summary, from_date, to_date),
+        "stock category sales": (get_daily_sales_summary, from_date, to_date, True),
+        "expenses": (get_expenses, from_date, to_date),
+        "previous month sales": (get_daily_sales_summary, prev_from_date, prev_to_date),
+        "previous month stock category sales": (get_daily_sales_summary, prev_from_date, prev_to_date, True),
+        "previous month expenses": (get_expenses, prev_from_date, prev_to_date)
+    })
+    failed = [name for name, res in loaded.items() if res["error"] is not None]
+    if failed:
+        st.error(f"Failed to load {', '.join(failed)} 😞")
+        st.stop()
+
+    sales_data = loaded["sales"]["data"]
+    items_data = loaded["stock category sales"]["data"]
+
+    # current expenses
+    expenses_data = loaded["expenses"]["data"]
+    expenses_data_grp = expenses_data.groupby(["expense_type_id", "expense_type_name"], as_index=False).sum("amount")
+
+    prev_data = loaded["previous month sales"]["data"]
+    prev_items_data = loaded["previous month stock category sales"]["data"]
 
     # previous expenses
-    prev_expenses_data = get_expenses(from_date, to_date)
+    prev_expenses_data = loaded["previous month expenses"]["data"]
     prev_expenses_data = prev_expenses_data.groupby(["expense_type_id", "expense_type_name"], as_index=False).sum("amount")
 
     prev_month_name = calendar.month_abbr[prev_month.month]
     current_month_name = calendar.month_abbr[int(filtered_month)]
 
 
+# Each section below is a fragment over the data loaded above: interacting with one
+# section reruns only that section, not the queries or the other sections.
+
 # KPIs
+@st.fragment
 def kpi_metrics():
-    # Previous Month
-    prev_orders = prev_data["id"].nunique()
-    prev_quantity = prev_data["quantity"].sum()
-    prev_revenue = prev_data.groupby("id")["paid_amount"].first().sum()
-    prev_delivery_charges = prev_data.groupby("id")["delivery_charges"].first().sum()
-    prev_discount = prev_data.groupby("id")["discount"].first().sum()
-    prev_expenses = prev_expenses_data["amount"].sum() if prev_expenses_data.shape[0] else 0
-
-    # Current Month
-    total_orders = orders_data["id"].nunique()
-    total_quantity = orders_data["quantity"].sum()
-    total_revenue = orders_data.groupby("id")["paid_amount"].first().sum()
-    total_delivery_charges = orders_data.groupby("id")["delivery_charges"].first().sum()
-    total_discount = orders_data.groupby("id")["discount"].first().sum()
-    total_expenses = expenses_data["amount"].sum() if expenses_data.shape[0] else 0
+    kpis = compute_kpis(sales_data, prev_data, expenses_data, prev_expenses_data)
 
     # Orders, Quantity, Revenue
     col1, col2, col3 = st.columns(3)
     col1.metric(
-        "🧾 Orders", total_orders, 
-        delta=f"{utils.percentage_change(total_orders, prev_orders):.2f}%",
+        "🧾 Orders", kpis["orders"]["current"], 
+        delta=f"{kpis['orders']['delta']:.2f}%",
         border=True
     )
     col2.metric(
-        "📦 Quantity", total_quantity, 
-        delta=f"{utils.percentage_change(total_quantity, prev_quantity):.2f}%",
+        "📦 Quantity", kpis["quantity"]["current"], 
+        delta=f"{kpis['quantity']['delta']:.2f}%",
         border=True
     )
     col3.metric(
-        "💰 Revenue", f"{total_revenue / 1e5:.1f} L", 
-        delta=f"{utils.percentage_change(total_revenue, prev_revenue):.2f}%",
+        "💰 Revenue", f"{kpis['revenue']['current'] / 1e5:.1f} L", 
+        delta=f"{kpis['revenue']['delta']:.2f}%",
         border=True
     )
 
     # Delivery Charges, Discount, Expenses
     col1, col2, col3 = st.columns(3)
     col1.metric(
-        "🚚 Delivery Charges", f"{total_delivery_charges:,}",
-        delta=f"{utils.percentage_change(total_delivery_charges, prev_delivery_charges):.2f}%",
+        "🚚 Delivery Charges", f"{kpis['delivery_charges']['current']:,}",
+        delta=f"{kpis['delivery_charges']['delta']:.2f}%",
         delta_color="inverse",
         border=True
     )
     col2.metric(
-        "➖ Discount", f"{total_discount:,}",
-        delta=f"{utils.percentage_change(total_discount, prev_discount):.2f}%",
+        "➖ Discount", f"{kpis['discount']['current']:,}",
+        delta=f"{kpis['discount']['delta']:.2f}%",
         delta_color="inverse",
         border=True
     )
     col3.metric(
-        "💸 Expenses", f"{total_expenses / 1e5:.1f} L",
-        delta=f"{utils.percentage_change(total_expenses, prev_expenses):.2f}%",
+        "💸 Expenses", f"{kpis['expenses']['current'] / 1e5:.1f} L",
+        delta=f"{kpis['expenses']['delta']:.2f}%",
         delta_color="inverse",
         border=True
     )
@@ -117,102 +132,112 @@ def kpi_metrics():
 
 
 # Daily Quantity & Revenue
+@st.fragment
 def daily_quantity_and_revenue():
     col1, col2 = st.columns(2)
     with col1:  
         # Quantity - Bar Chart
-        agg_daily_quantity = orders_data.groupby(["date"]).agg({
+        agg_daily_quantity = sales_data.groupby(["date"]).agg({
             "quantity": "sum"
         }).reset_index()
         agg_daily_quantity.columns = ["Date", "Quantity"]
 
         st.markdown("📦 Daily Quantity")
         mean_value = agg_daily_quantity["Quantity"].mean()
-        fig = px.bar(
-            data_frame=agg_daily_quantity, 
-            x="Date",
-            y="Quantity",
-            color_discrete_sequence=["#4daf4a"]
-        ) \
-        .update_traces(
-            hovertemplate=(
-                "<b>%{x|%m-%d}</b><br>"
-                "Quantity: %{value}"
-            )
-        ) \
-        .add_trace(
-            go.Scatter(
-                x=agg_daily_quantity["Date"],
-                y=[mean_value] * len(agg_daily_quantity),
-                mode="lines",
-                line=dict(color="red", dash="dash"),
-                name=f"Mean = {mean_value :.0f}",
-                hovertemplate=f"Mean = {mean_value :.0f}"
-            )
-        ) \
-        .update_layout(
-            xaxis_tickformat="%m-%d",
-            yaxis_tickformat=".0f",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
+
+        def build():
+            fig = px.bar(
+                data_frame=agg_daily_quantity, 
+                x="Date",
+                y="Quantity",
+                color_discrete_sequence=["#4daf4a"]
+            ) \
+            .update_traces(
+                hovertemplate=(
+                    "<b>%{x|%m-%d}</b><br>"
+                    "Quantity: %{value}"
+                )
+            ) \
+            .add_trace(
+                go.Scatter(
+                    x=agg_daily_quantity["Date"],
+                    y=[mean_value] * len(agg_daily_quantity),
+                    mode="lines",
+                    line=dict(color="red", dash="dash"),
+                    name=f"Mean = {mean_value :.0f}",
+                    hovertemplate=f"Mean = {mean_value :.0f}"
+                )
+            ) \
+            .update_layout(
+                xaxis_tickformat="%m-%d",
+                yaxis_tickformat=".0f",
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=1.02,
+                    xanchor="center",
+                    x=0.5
+                )
             )
-        )
+            return fig
+        fig = figure_cache.cached_figure("monthly_daily_quantity", agg_daily_quantity, build)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Revenue - Bar Chart
-        agg_daily_revenue = orders_data.drop_duplicates(subset=["order_no"]).groupby(["date"]).agg({
+        agg_daily_revenue = sales_data.groupby(["date"]).agg({
             "paid_amount": "sum"
         }).reset_index()
         agg_daily_revenue.columns = ["Date", "Revenue"]
 
         st.markdown("💰 Daily Revenue")
         mean_value = agg_daily_revenue["Revenue"].mean()
-        fig = px.bar(
-            data_frame=agg_daily_revenue, 
-            x="Date",
-            y="Revenue",
-            color_discrete_sequence=["#d62728"]
-        ) \
-        .update_traces(
-            hovertemplate=(
-                "<b>%{x|%m-%d}</b><br>"
-                "Revenue: %{value}"
-            )
-        ) \
-        .add_trace(
-            go.Scatter(
-                x=agg_daily_revenue["Date"],
-                y=[mean_value] * len(agg_daily_revenue),
-                mode="lines",
-                line=dict(color="green", dash="dash"),
-                name=f"Mean = {mean_value :,.0f}",
-                hovertemplate=f"Mean = {mean_value :,.0f}"
-            )
-        ) \
-        .update_layout(
-            xaxis_tickformat="%m-%d",
-            yaxis_tickformat=",.0f",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
+
+        def build():
+            fig = px.bar(
+                data_frame=agg_daily_revenue, 
+                x="Date",
+                y="Revenue",
+                color_discrete_sequence=["#d62728"]
+            ) \
+            .update_traces(
+                hovertemplate=(
+                    "<b>%{x|%m-%d}</b><br>"
+                    "Revenue: %{value}"
+                )
+            ) \
+            .add_trace(
+                go.Scatter(
+                    x=agg_daily_revenue["Date"],
+                    y=[mean_value] * len(agg_daily_revenue),
+                    mode="lines",
+                    line=dict(color="green", dash="dash"),
+                    name=f"Mean = {mean_value :,.0f}",
+                    hovertemplate=f"Mean = {mean_value :,.0f}"
+                )
+            ) \
+            .update_layout(
+                xaxis_tickformat="%m-%d",
+                yaxis_tickformat=",.0f",
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=1.02,
+                    xanchor="center",
+                    x=0.5
+                )
             )
-        )
+            return fig
+        fig = figure_cache.cached_figure("monthly_daily_revenue", agg_daily_revenue, build)
         st.plotly_chart(fig, use_container_width=True)
 
     st.divider()
 
 
 # Stock Category Insights
+@st.fragment
 def quantity_and_amount_by_stock_category():
-    agg_stock_category = orders_data.groupby(["stock_category_name"]).agg({
+    agg_stock_category = items_data.groupby(["stock_category_name"]).agg({
         "quantity": "sum",
         "amount": "sum"
     }).reset_index()
@@ -222,44 +247,53 @@ def quantity_and_amount_by_stock_category():
     with col1:  
         # Quantity - Donut Chart
         st.markdown("📦 Quantity by Stock Category")
-        pie_quantity_by_stock_category = px.pie(
-            data_frame=agg_stock_category, 
-            names="Stock Category", 
-            values="Quantity",
-            hole=0.4
-        ) \
-        .update_traces(
-            hovertemplate=(
-                "<b>%{label}</b><br>"
-                "Quantity: %{value}"
+
+        def build():
+            pie_quantity_by_stock_category = px.pie(
+                data_frame=agg_stock_category, 
+                names="Stock Category", 
+                values="Quantity",
+                hole=0.4
+            ) \
+            .update_traces(
+                hovertemplate=(
+                    "<b>%{label}</b><br>"
+                    "Quantity: %{value}"
+                )
             )
-        )
+            return pie_quantity_by_stock_category
+        pie_quantity_by_stock_category = figure_cache.cached_figure("monthly_stock_category_quantity", agg_stock_category, build)
         st.plotly_chart(pie_quantity_by_stock_category, use_container_width=True)
     
     with col2:
         # Amount - Bar Chart
         st.markdown("💰 Amount by Stock Category")
-        bar_amount_by_stock_category = px.bar(
-            data_frame=agg_stock_category.sort_values(by="Amount", ascending=False), 
-            x="Stock Category",
-            y="Amount",
-            color="Stock Category"
-        ) \
-        .update_layout(yaxis_tickformat=",.0f") \
-        .update_traces(
-            hovertemplate=(
-                "<b>%{label}</b><br>"
-                "Amount: %{value}"
+
+        def build():
+            bar_amount_by_stock_category = px.bar(
+                data_frame=agg_stock_category.sort_values(by="Amount", ascending=False), 
+                x="Stock Category",
+                y="Amount",
+                color="Stock Category"
+            ) \
+            .update_layout(yaxis_tickformat=",.0f") \
+            .update_traces(
+                hovertemplate=(
+                    "<b>%{label}</b><br>"
+                    "Amount: %{value}"
+                )
             )
-        )
+            return bar_amount_by_stock_category
+        bar_amount_by_stock_category = figure_cache.cached_figure("monthly_stock_category_amount", agg_stock_category, build)
         st.plotly_chart(bar_amount_by_stock_category, use_container_width=True)
 
     st.divider()
 
 
 # Payment Insights
+@st.fragment
 def payment_insights():
-    agg_payment_type = orders_data.drop_duplicates(subset=["order_no"]).groupby(["date", "payment_type_name"]).agg({
+    agg_payment_type = sales_data.groupby(["date", "payment_type_name"]).agg({
         "paid_amount": "sum"
     }).reset_index()
 
@@ -277,86 +311,93 @@ def payment_insights():
     col1, col2 = st.columns([1, 2])
     with col1:
         # Sunburst Chart
-        # aggregate at leaf level (Date + Payment Type)
-        leaf_df = agg_payment_type.groupby(["Formatted Date", "Payment Type"], as_index=False)["Revenue"].sum()
-
-        # aggregate parent level (Payment Type)
-        parent_df = agg_payment_type.groupby("Payment Type", as_index=False)["Revenue"].sum()
-
-        labels = []
-        parents = []
-        values = []
-        hovertexts = []
-
-        # parent nodes
-        for _, row in parent_df.iterrows():
-            labels.append(row["Payment Type"])
-            parents.append("")  # No parent for top level
-            values.append(row["Revenue"])
-            hovertexts.append(
-                f"<b>{row['Payment Type']}</b><br>Revenue: {row['Revenue']:,.0f}"
-            )
-
-        # leaf nodes
-        for _, row in leaf_df.iterrows():
-            labels.append(row["Formatted Date"])
-            parents.append(row["Payment Type"])
-            values.append(row["Revenue"])
-            hovertexts.append(
-                f"<b>{row['Formatted Date']}</b><br>"
-                f"Revenue: {row['Revenue']:,.0f}<br>"
-                f"Payment Type: {row['Payment Type']}"
-            )
-
-        sunburst_payment_type = go.Figure(
-            go.Sunburst(
-                labels=labels,
-                parents=parents,
-                values=values,
-                hovertext=hovertexts,
-                hoverinfo="text",
-                branchvalues="total",
-                insidetextorientation="radial",
-                texttemplate="%{label}<br>%{value}"
-            )
-        ) \
-        .update_layout(margin=dict(t=10, l=10, r=10, b=10))
+        def build():
+            # aggregate at leaf level (Date + Payment Type)
+            leaf_df = agg_payment_type.groupby(["Formatted Date", "Payment Type"], as_index=False)["Revenue"].sum()
+
+            # aggregate parent level (Payment Type)
+            parent_df = agg_payment_type.groupby("Payment Type", as_index=False)["Revenue"].sum()
+
+            labels = []
+            parents = []
+            values = []
+            hovertexts = []
+
+            # parent nodes
+            for _, row in parent_df.iterrows():
+                labels.append(row["Payment Type"])
+                parents.append("")  # No parent for top level
+                values.append(row["Revenue"])
+                hovertexts.append(
+                    f"<b>{row['Payment Type']}</b><br>Revenue: {row['Revenue']:,.0f}"
+                )
+
+            # leaf nodes
+            for _, row in leaf_df.iterrows():
+                labels.append(row["Formatted Date"])
+                parents.append(row["Payment Type"])
+                values.append(row["Revenue"])
+                hovertexts.append(
+                    f"<b>{row['Formatted Date']}</b><br>"
+                    f"Revenue: {row['Revenue']:,.0f}<br>"
+                    f"Payment Type: {row['Payment Type']}"
+                )
+
+            sunburst_payment_type = go.Figure(
+                go.Sunburst(
+                    labels=labels,
+                    parents=parents,
+                    values=values,
+                    hovertext=hovertexts,
+                    hoverinfo="text",
+                    branchvalues="total",
+                    insidetextorientation="radial",
+                    texttemplate="%{label}<br>%{value}"
+                )
+            ) \
+            .update_layout(margin=dict(t=10, l=10, r=10, b=10))
+            return sunburst_payment_type
+        sunburst_payment_type = figure_cache.cached_figure("monthly_payment_sunburst", agg_payment_type, build)
         st.plotly_chart(sunburst_payment_type, use_container_width=True)
 
     with col2:
         # Stacked Bar Chart
-        stack_order = (
-            agg_payment_type.groupby("Payment Type")["Percent"].mean().sort_values(ascending=False).index.tolist()
-        )
+        def build():
+            stack_order = (
+                agg_payment_type.groupby("Payment Type")["Percent"].mean().sort_values(ascending=False).index.tolist()
+            )
 
-        stacked_bar_payment_type = px.bar(
-            data_frame=agg_payment_type,
-            x="Date",
-            y="Percent",
-            color="Payment Type",
-            custom_data=["Formatted Date", "Payment Type", "Revenue", "Percent"],
-            category_orders={"Payment Type": stack_order}
-        ) \
-        .update_layout(
-            barmode="stack",
-            xaxis={
-                "tickformat": "%m-%d"
-            }
-        ) \
-        .update_traces(
-            hovertemplate=(
-                "Date: %{customdata[0]}<br>"
-                "Payment Type: %{customdata[1]}<br>"
-                "Revenue: %{customdata[2]:,}<br>"
-                "Percent: %{customdata[3]:.2f}%"
+            stacked_bar_payment_type = px.bar(
+                data_frame=agg_payment_type,
+                x="Date",
+                y="Percent",
+                color="Payment Type",
+                custom_data=["Formatted Date", "Payment Type", "Revenue", "Percent"],
+                category_orders={"Payment Type": stack_order}
+            ) \
+            .update_layout(
+                barmode="stack",
+                xaxis={
+                    "tickformat": "%m-%d"
+                }
+            ) \
+            .update_traces(
+                hovertemplate=(
+                    "Date: %{customdata[0]}<br>"
+                    "Payment Type: %{customdata[1]}<br>"
+                    "Revenue: %{customdata[2]:,}<br>"
+                    "Percent: %{customdata[3]:.2f}%"
+                )
             )
-        )
+            return stacked_bar_payment_type
+        stacked_bar_payment_type = figure_cache.cached_figure("monthly_payment_stacked_bar", agg_payment_type, build)
         st.plotly_chart(stacked_bar_payment_type, use_container_width=True)
 
     st.divider()
 
 
 # Expense Insights
+@st.fragment
 def expense_insights():
     if expenses_data.shape[0] == 0:
         return
@@ -372,31 +413,37 @@ def expense_insights():
             df_treemap = pd.concat([expenses_data, dummy_row], ignore_index=True)
 
         # Treemap
-        fig_treemap = px.treemap(
-            df_treemap,  # expenses_data, 
-            path=["expense_type_name"],
-            values="amount"
-        ).update_traces(
-            hovertemplate=(
-                "<b>%{label}</b><br>"
-                "%{value:,.0f}"
+        def build():
+            fig_treemap = px.treemap(
+                df_treemap,  # expenses_data, 
+                path=["expense_type_name"],
+                values="amount"
+            ).update_traces(
+                hovertemplate=(
+                    "<b>%{label}</b><br>"
+                    "%{value:,.0f}"
+                )
             )
-        )
+            return fig_treemap
+        fig_treemap = figure_cache.cached_figure("monthly_expense_treemap", df_treemap, build)
         st.plotly_chart(fig_treemap, use_container_width=True)
 
     with col2:
         # Radar chart
-        fig_radar = go.Figure()
-        fig_radar.add_trace(go.Scatterpolar(
-            r=expenses_data_grp["amount"],
-            theta=expenses_data_grp["expense_type_name"],
-            fill="toself",
-            name="Expenses",
-            hovertemplate="<b>%{theta}</b><br>%{r:,.0f}<extra></extra>"
-        ))
-        fig_radar.update_layout(
-            polar=dict(radialaxis=dict(visible=True))
-        )
+        def build():
+            fig_radar = go.Figure()
+            fig_radar.add_trace(go.Scatterpolar(
+                r=expenses_data_grp["amount"],
+                theta=expenses_data_grp["expense_type_name"],
+                fill="toself",
+                name="Expenses",
+                hovertemplate="<b>%{theta}</b><br>%{r:,.0f}<extra></extra>"
+            ))
+            fig_radar.update_layout(
+                polar=dict(radialaxis=dict(visible=True))
+            )
+            return fig_radar
+        fig_radar = figure_cache.cached_figure("monthly_expense_radar", expenses_data_grp, build)
         st.plotly_chart(fig_radar, use_container_width=True)
 
     st.divider()
@@ -404,70 +451,78 @@ def expense_insights():
 
 # This Month vs Last Month
 def get_comparison_figure(df: pd.DataFrame, x_name: str, title: str, xaxis_title: str, yaxis_title: str, current_month_marker_color: str):
-    fig = go.Figure()
-
-    # bars
-    fig.add_trace(
-        go.Bar(
-            name=prev_month_name, 
-            x=df[x_name], 
-            y=df[prev_month_name], 
-            marker_color="lightslategray",
-            hovertemplate=(
-                "<b>%{x}</b><br>"
-                f"<b>Month:</b> {prev_month_name}<br>"
-                f"<b>{yaxis_title}:</b> " + "%{y}<extra></extra>"
+
+    def build():
+        fig = go.Figure()
+
+        # bars
+        fig.add_trace(
+            go.Bar(
+                name=prev_month_name, 
+                x=df[x_name], 
+                y=df[prev_month_name], 
+                marker_color="lightslategray",
+                hovertemplate=(
+                    "<b>%{x}</b><br>"
+                    f"<b>Month:</b> {prev_month_name}<br>"
+                    f"<b>{yaxis_title}:</b> " + "%{y}<extra></extra>"
+                )
             )
         )
-    )
-    fig.add_trace(
-        go.Bar(
-            name=current_month_name, 
-            x=df[x_name], 
-            y=df[current_month_name], 
-            marker_color=current_month_marker_color,
-            hovertemplate=(
-                "<b>%{x}</b><br>"
-                f"<b>Month:</b> {current_month_name}<br>"
-                f"<b>{yaxis_title}:</b> " + "%{y}<extra></extra>"
+        fig.add_trace(
+            go.Bar(
+                name=current_month_name, 
+                x=df[x_name], 
+                y=df[current_month_name], 
+                marker_color=current_month_marker_color,
+                hovertemplate=(
+                    "<b>%{x}</b><br>"
+                    f"<b>Month:</b> {current_month_name}<br>"
+                    f"<b>{yaxis_title}:</b> " + "%{y}<extra></extra>"
+                )
             )
         )
-    )
 
-    # annotations for percentage change
-    for _, row in df.iterrows():
-        arrow_color = "green" if row["Pct Change"] >= 0 else "red"
-        text_position = max(row[prev_month_name], row[current_month_name]) + 10
-        if row["Pct Change"] >= 0:
-            ax_offset, ay_offset = -20, 20
-        else:
-            ax_offset, ay_offset = -20, -20
-
-        fig.add_annotation(
-            x=row[x_name], 
-            y=text_position, 
-            text=f"{row['Pct Change'] :+.2f}%", 
-            showarrow=True,
-            arrowhead=2,
-            arrowsize=1.5,
-            arrowwidth=2,
-            arrowcolor=arrow_color,
-            ax=ax_offset,
-            ay=ay_offset,
-            font=dict(color="black", size=12)
+        # annotations for percentage change
+        for _, row in df.iterrows():
+            arrow_color = "green" if row["Pct Change"] >= 0 else "red"
+            text_position = max(row[prev_month_name], row[current_month_name]) + 10
+            if row["Pct Change"] >= 0:
+                ax_offset, ay_offset = -20, 20
+            else:
+                ax_offset, ay_offset = -20, -20
+
+            fig.add_annotation(
+                x=row[x_name], 
+                y=text_position, 
+                text=f"{row['Pct Change'] :+.2f}%", 
+                showarrow=True,
+                arrowhead=2,
+                arrowsize=1.5,
+                arrowwidth=2,
+                arrowcolor=arrow_color,
+                ax=ax_offset,
+                ay=ay_offset,
+                font=dict(color="black", size=12)
+            )
+
+        fig.update_layout(
+            title=title,
+            barmode="group",
+            xaxis_title=xaxis_title,
+            yaxis_title=yaxis_title,
+            yaxis_tickformat=",.0f"
         )
 
-    fig.update_layout(
-        title=title,
-        barmode="group",
-        xaxis_title=xaxis_title,
-        yaxis_title=yaxis_title,
-        yaxis_tickformat=",.0f"
-    )
+        return fig
 
-    return fig
+    return figure_cache.cached_figure(
+        "monthly_comparison", df, build,
+        x_name, title, xaxis_title, yaxis_title, current_month_marker_color, prev_month_name, current_month_name
+    )
 
 
+@st.fragment
 def this_month_vs_last_month():
     if not prev_data.shape[0]:
         return
@@ -475,13 +530,13 @@ def this_month_vs_last_month():
     st.markdown("🆚 This Month vs Last Month")
 
     agg_prev_month, agg_current_month = pd.DataFrame(), pd.DataFrame()
-    if prev_data.shape[0]:
-        agg_prev_month = prev_data.groupby(["stock_category_name"]).agg({
+    if prev_items_data.shape[0]:
+        agg_prev_month = prev_items_data.groupby(["stock_category_name"]).agg({
             "quantity": "sum",
             "amount": "sum"
         }).reset_index()
-    if orders_data.shape[0]:
-        agg_current_month = orders_data.groupby(["stock_category_name"]).agg({
+    if items_data.shape[0]:
+        agg_current_month = items_data.groupby(["stock_category_name"]).agg({
             "quantity": "sum",
             "amount": "sum"
         }).reset_index()
@@ -532,11 +587,11 @@ def this_month_vs_last_month():
         # Revenue Change
         agg_prev_month, agg_current_month = pd.DataFrame(), pd.DataFrame()
         if prev_data.shape[0]:
-            agg_prev_month = prev_data.drop_duplicates(subset=["order_no"]).groupby(["payment_type_name"]).agg({
+            agg_prev_month = prev_data.groupby(["payment_type_name"]).agg({
                 "paid_amount": "sum"
             }).reset_index()
-        if orders_data.shape[0]:
-            agg_current_month = orders_data.drop_duplicates(subset=["order_no"]).groupby(["payment_type_name"]).agg({
+        if sales_data.shape[0]:
+            agg_current_month = sales_data.groupby(["payment_type_name"]).agg({
                 "paid_amount": "sum"
             }).reset_index()
 
@@ -564,6 +619,7 @@ def this_month_vs_last_month():
 
 
 # Monthly Summary
+@st.fragment
 def monthly_summary():
     st.markdown("📋 Monthly Summary")
     
@@ -571,12 +627,11 @@ def monthly_summary():
 
     # Orders
     with tab1:
-        summary_df = orders_data \
-            .drop_duplicates(subset=["order_no"]) \
+        summary_df = sales_data \
             .groupby(["date"]) \
             .agg(
-                orders=("order_no", "count"),
-                quantity=("ttl_quantity", "sum"),
+                orders=("orders", "sum"),
+                quantity=("quantity", "sum"),
                 discount=("discount", "sum"),
                 delivery_charges=("delivery_charges", "sum"),
                 paid_amount=("paid_amount", "sum")
@@ -608,8 +663,7 @@ def monthly_summary():
 
     # Payment Types
     with tab2:  
-        summary_df = orders_data \
-            .drop_duplicates(subset=["order_no"]) \
+        summary_df = sales_data \
             .groupby(["date", "payment_type_name"]) \
             .agg(
                 paid_amount=("paid_amount", "sum")
@@ -636,7 +690,7 @@ def monthly_summary():
 
     # Stock Categories
     with tab3:
-        summary_df = orders_data \
+        summary_df = items_data \
             .groupby(["date", "stock_category_name"]) \
             .agg(
                 quantity=("quantity", "sum"),
@@ -691,7 +745,7 @@ def monthly_summary():
         )
 
 
-if orders_data.shape[0]:
+if sales_data.shape[0]:
     st.title("🗓️ Monthly Report")
     st.markdown(f"### Month: `{filtered_year}-{filtered_month}`")
 
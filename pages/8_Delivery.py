@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import math
 from datetime import datetime, date, timedelta
-from src.order import get_undelivered_orders, get_delivered_orders, get_order_items, get_order_by_id, update_delivery_status
-from src.utils import confirmation_dialog, build_receipt_html
+from src.order import get_undelivered_orders, get_delivered_orders, get_orders_with_items, deliver_orders, reschedule_deliveries
+from src.utils import confirmation_dialog
+import src.query_cache as query_cache
+from src.receipt import build_receipt_html, build_receipts_html
 from streamlit.components.v1 import html
 
 st.set_page_config(layout="centered")
@@ -30,10 +32,34 @@ if "last_filter_mode_undelivered" not in st.session_state:
     st.session_state["last_filter_mode_undelivered"] = None
 if "last_filter_value_undelivered" not in st.session_state:
     st.session_state["last_filter_value_undelivered"] = None
+if "selected_undelivered_ids" not in st.session_state:
+    st.session_state["selected_undelivered_ids"] = set()
+
+def toggle_selected_order(order_id: int):
+    if st.session_state[f"select_order_{order_id}"]:
+        st.session_state["selected_undelivered_ids"].add(order_id)
+    else:
+        st.session_state["selected_undelivered_ids"].discard(order_id)
+
+def unselect_orders(order_ids):
+    # the checkbox keys keep their own value, so drop them together with the selection
+    for order_id in order_ids:
+        st.session_state["selected_undelivered_ids"].discard(order_id)
+        st.session_state.pop(f"select_order_{order_id}", None)
+
+def get_page_orders(order_ids: list):
+    # full order rows and items of the visible cards, fetched once per page and reused by
+    # Info and Receipt on later reruns until the page or an order / customer changes
+    key = (tuple(order_ids), query_cache.version_stamp(("orders", "order_items", "customers")))
+    cached = st.session_state.get("undelivered_page_orders")
+    if cached is None or cached[0] != key:
+        page_orders, items_by_order = get_orders_with_items(order_ids=order_ids)
+        cached = (key, page_orders.set_index("id", drop=False), items_by_order)
+        st.session_state["undelivered_page_orders"] = cached
+    return cached[1], cached[2]
 
 @st.dialog(title="Order Info", width="large")
-def display_order_info_dialog(id: int, date: date, order_no: str, customer_serial_no: str, customer_name: str, measurement: str):
-    items = get_order_items(dt=None, order_ids=[str(id)])
+def display_order_info_dialog(order_no: str, customer_serial_no: str, customer_name: str, measurement: str, items: pd.DataFrame):
     items = items[["stock_category_name", "description", "quantity"]]
     items.columns = ["Stock Category", "Description", "Quantity"]
     
@@ -129,6 +155,49 @@ with tab1:
 
     st.write("### Undelivered Orders")
     if data_undelivered.shape[0]:
+        # keep only selected orders that are still in the list
+        selected_ids = st.session_state["selected_undelivered_ids"]
+        selected_ids &= set(int(id) for id in data_undelivered["id"])
+
+        # bulk actions on the selected orders
+        bulk_col1, bulk_col2, bulk_col3, bulk_col4, bulk_col5 = st.columns([2, 2, 2, 2, 2], vertical_alignment="bottom")
+        with bulk_col1:
+            st.markdown(f"**{len(selected_ids)}** selected")
+        with bulk_col2:
+            if st.button("🚛 Deliver", help="Deliver selected orders", use_container_width=True, disabled=not (deliver_permission and selected_ids)):
+                st.session_state["to_deliver_order_ids"] = sorted(selected_ids)
+                confirmation_dialog(
+                    msg=f"Are you sure to deliver {len(selected_ids)} orders?", 
+                    yes_button_txt="✅ Yes, deliver", 
+                    no_button_txt="❌ Cancel"
+                )
+        with bulk_col3:
+            reschedule_date = st.date_input(
+                label="Reschedule To", 
+                value=datetime.today() + timedelta(days=1), format="YYYY-MM-DD", 
+                key="reschedule_date_undelivered"
+            )
+        with bulk_col4:
+            if st.button("📅 Reschedule", help="Move the due date of selected orders", use_container_width=True, disabled=not (deliver_permission and selected_ids)):
+                result = reschedule_deliveries(ids=sorted(selected_ids), delivery_date=reschedule_date)
+                if result["success"]:
+                    st.session_state["show_success"] = True
+                    st.session_state["show_success_msg"] = f"{len(result['ids'])} orders have been rescheduled."
+                    unselect_orders(list(selected_ids))
+                else:
+                    st.session_state["show_error"] = True
+                    st.session_state["show_error_msg"] = "Rescheduling orders has failed due to some errors."
+                st.rerun()
+        with bulk_col5:
+            # the selected receipts in one print job
+            if st.button("🖨️ Print", help="Print receipts of selected orders", use_container_width=True, disabled=not (receipt_permission and selected_ids)):
+                selected_orders, selected_items = get_orders_with_items(order_ids=sorted(selected_ids))
+                receipts_html = build_receipts_html([
+                    (order, selected_items[int(order["id"])].to_dict(orient="records"))
+                    for _, order in selected_orders.iterrows()
+                ])
+                html(receipts_html, height=0, width=0)
+
         # pagination
         total_pages = (len(data_undelivered) - 1) // orders_per_page + 1
         col1, col2, col3 = st.columns([1, 3, 1], vertical_alignment="center")
@@ -147,6 +216,7 @@ with tab1:
         start = (st.session_state["undelivered_page"] - 1) * orders_per_page
         end = start + orders_per_page
         paginated_data = data_undelivered[start : end]
+        page_orders, items_by_order = get_page_orders([int(id) for id in paginated_data["id"]])
 
         for i in range(0, len(paginated_data), cols_per_row):
             cols = st.columns(cols_per_row)
@@ -171,22 +241,30 @@ with tab1:
                         unsafe_allow_html=True
                     )
 
+                    order_id = int(rows.iloc[j]["id"])
+                    st.checkbox(
+                        label="Select", 
+                        value=order_id in selected_ids,
+                        key=f"select_order_{order_id}",
+                        on_change=toggle_selected_order,
+                        args=(order_id,)
+                    )
+
                     btn_col1, btn_col2, btn_col3 = st.columns(3)
                     # Order Info Button
                     with btn_col1:
                         if st.button("ℹ️", help="Order Info", key=f"info_order_{rows.iloc[j]['id']}", use_container_width=True):
                             display_order_info_dialog(
-                                id=rows.iloc[j]["id"],
-                                date=rows.iloc[j]["date"],
                                 order_no=rows.iloc[j]["order_no"],
                                 customer_serial_no=rows.iloc[j]["customer_serial_no"],
                                 customer_name=rows.iloc[j]["customer_name"],
-                                measurement=rows.iloc[j]['measurement']
+                                measurement=rows.iloc[j]['measurement'],
+                                items=items_by_order[order_id]
                             )
                     # Deliver Button
                     with btn_col2:
                         if st.button("🚛", help="Deliver", key=f"deliver_{rows.iloc[j]['id']}_{i}", use_container_width=True, disabled=not deliver_permission):
-                            st.session_state["to_deliver_order_id"] = rows.iloc[j]["id"]
+                            st.session_state["to_deliver_order_ids"] = [order_id]
                             confirmation_dialog(
                                 msg="Are you sure to deliver this order?", 
                                 yes_button_txt="✅ Yes, deliver", 
@@ -195,9 +273,10 @@ with tab1:
                     # Receipt Button
                     with btn_col3:
                         if st.button("🖨️", help="Print Receipt", key=f"receipt_{rows.iloc[j]['id']}_{i}", use_container_width=True, disabled=not receipt_permission):
-                            order = get_order_by_id(id=int(rows.iloc[j]["id"]))
-                            items = get_order_items(dt=None, order_ids=[int(rows.iloc[j]["id"])])
-                            receipt_html = build_receipt_html(order=order.iloc[0], items=items.to_dict(orient="records"))
+                            receipt_html = build_receipt_html(
+                                order=page_orders.loc[order_id],
+                                items=items_by_order[order_id].to_dict(orient="records")
+                            )
                             html(receipt_html, height=0, width=0)
     else:
         st.info("No data available 📭")
@@ -242,19 +321,20 @@ with tab2:
 
 # Order confirmed and good to go 
 if "confirmed_action" in st.session_state:
-    if st.session_state["confirmed_action"] == True and "to_deliver_order_id" in st.session_state:
-        success = update_delivery_status(
-            id=int(st.session_state["to_deliver_order_id"]),
-            is_delivered=True,
+    if st.session_state["confirmed_action"] == True and "to_deliver_order_ids" in st.session_state:
+        # one UPDATE for every order being delivered
+        result = deliver_orders(
+            ids=st.session_state["to_deliver_order_ids"],
             delivery_date=datetime.now().strftime("%Y-%m-%d")
         )
 
-        if success:
+        if result["success"]:
             st.session_state["show_success"] = True
-            st.session_state["show_success_msg"] = "Order has been delivered."
+            st.session_state["show_success_msg"] = "Order has been delivered." if len(result["ids"]) == 1 else f"{len(result['ids'])} orders have been delivered."
+            unselect_orders(result["ids"])
             del st.session_state["confirmed_action"]
-            del st.session_state["to_deliver_order_id"]
+            del st.session_state["to_deliver_order_ids"]
         else:
             st.session_state["show_error"] = True
-            st.session_state["show_error_msg"] = "Delivering an order has failed due to some errors."
+            st.session_state["show_error_msg"] = "Delivering orders has failed due to some errors."
         st.rerun()
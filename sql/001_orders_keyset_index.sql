@@ -0,0 +1,6 @@
+-- Keyset pagination for the Order list (src.order.get_orders_page)
+-- pages walk orders by (date DESC, id DESC), so both the first page and every
+-- "(date, id) < (:after_date, :after_id)" page are served by an index range scan.
+
+CREATE INDEX IF NOT EXISTS idx_orders_date_id
+    ON orders (date DESC, id DESC);
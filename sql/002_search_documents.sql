@@ -0,0 +1,104 @@
+-- Search documents for orders and customers (src.search)
+-- every search box ORs 8-9 ILIKE '%term%' predicates together, which can only be
+-- answered by a sequential scan of v_orders/customers. Instead each row keeps one
+-- lower-cased search_document covering the same fields, indexed with pg_trgm so
+-- "search_document ILIKE '%term%'" is a GIN index lookup.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+
+-- customers: all searched fields live on the row, so a generated column is enough
+ALTER TABLE customers
+    ADD COLUMN IF NOT EXISTS search_document text
+    GENERATED ALWAYS AS (
+        lower(
+            coalesce(serial_no, '') || ' ' ||
+            coalesce(name, '') || ' ' ||
+            coalesce(phone, '') || ' ' ||
+            coalesce(home_address, '') || ' ' ||
+            coalesce(delivery_address, '') || ' ' ||
+            coalesce(city, '') || ' ' ||
+            coalesce(state_region, '') || ' ' ||
+            coalesce(country, '')
+        )
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_customers_search_document
+    ON customers USING gin (search_document gin_trgm_ops);
+
+
+-- orders: the document also carries customer and payment type fields,
+-- so it is maintained by triggers on orders, customers and payment_types
+ALTER TABLE orders
+    ADD COLUMN IF NOT EXISTS search_document text;
+
+CREATE OR REPLACE FUNCTION orders_set_search_document() RETURNS trigger AS $$
+BEGIN
+    NEW.search_document := lower(
+        coalesce(NEW.order_no, '') || ' ' ||
+        coalesce((
+            SELECT
+                coalesce(c.serial_no, '') || ' ' ||
+                coalesce(c.name, '') || ' ' ||
+                coalesce(c.phone, '') || ' ' ||
+                coalesce(c.city, '') || ' ' ||
+                coalesce(c.state_region, '') || ' ' ||
+                coalesce(c.country, '')
+            FROM customers AS c
+            WHERE c.id = NEW.customer_id
+        ), '') || ' ' ||
+        coalesce((
+            SELECT pt.name
+            FROM payment_types AS pt
+            WHERE pt.id = NEW.payment_type_id
+        ), '') || ' ' ||
+        coalesce(NEW.delivery_address, '')
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_orders_search_document ON orders;
+CREATE TRIGGER trg_orders_search_document
+    BEFORE INSERT OR UPDATE OF order_no, customer_id, payment_type_id, delivery_address, search_document
+    ON orders
+    FOR EACH ROW EXECUTE FUNCTION orders_set_search_document();
+
+-- touching search_document re-runs the BEFORE trigger above for the affected orders
+CREATE OR REPLACE FUNCTION customers_refresh_order_search_documents() RETURNS trigger AS $$
+BEGIN
+    UPDATE orders SET search_document = NULL WHERE customer_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- update_customer SETs every column, so only a change to a searched field rewrites the orders
+DROP TRIGGER IF EXISTS trg_customers_order_search_documents ON customers;
+CREATE TRIGGER trg_customers_order_search_documents
+    AFTER UPDATE OF serial_no, name, phone, city, state_region, country
+    ON customers
+    FOR EACH ROW
+    WHEN ((OLD.serial_no, OLD.name, OLD.phone, OLD.city, OLD.state_region, OLD.country)
+          IS DISTINCT FROM (NEW.serial_no, NEW.name, NEW.phone, NEW.city, NEW.state_region, NEW.country))
+    EXECUTE FUNCTION customers_refresh_order_search_documents();
+
+CREATE OR REPLACE FUNCTION payment_types_refresh_order_search_documents() RETURNS trigger AS $$
+BEGIN
+    UPDATE orders SET search_document = NULL WHERE payment_type_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payment_types_order_search_documents ON payment_types;
+CREATE TRIGGER trg_payment_types_order_search_documents
+    AFTER UPDATE OF name
+    ON payment_types
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION payment_types_refresh_order_search_documents();
+
+-- backfill existing orders
+UPDATE orders SET search_document = NULL;
+
+CREATE INDEX IF NOT EXISTS idx_orders_search_document
+    ON orders USING gin (search_document gin_trgm_ops);
@@ -0,0 +1,102 @@
+-- Daily sales rollup (src.order keeps it current, src.report reads it)
+-- one row per date x payment type x stock category:
+--   stock_category_id IS NULL  -> order-level totals for the date and payment type
+--                                 (orders, ttl_quantity, ttl_amount, paid_amount, discount, delivery_charges)
+--   stock_category_id NOT NULL -> item-level totals for that category
+--                                 (orders containing it, quantity, amount; order-level money columns are 0)
+--
+-- src.order.add_order/update_order/delete_order call refresh_daily_sales_summary() for the
+-- affected dates inside their own transaction.
+-- Backfill / full rebuild:
+--   psql -d ap_collection -c "SELECT rebuild_daily_sales_summary();"
+
+CREATE TABLE IF NOT EXISTS daily_sales_summary (
+    date                date        NOT NULL,
+    payment_type_id     integer,
+    stock_category_id   integer,
+    orders              integer     NOT NULL DEFAULT 0,
+    quantity            integer     NOT NULL DEFAULT 0,
+    amount              bigint      NOT NULL DEFAULT 0,
+    paid_amount         bigint      NOT NULL DEFAULT 0,
+    discount            bigint      NOT NULL DEFAULT 0,
+    delivery_charges    bigint      NOT NULL DEFAULT 0
+);
+
+-- the money columns hold whole amounts like the orders / order_items columns they sum;
+-- tables created with the earlier numeric columns are converted in place
+ALTER TABLE daily_sales_summary
+    ALTER COLUMN amount TYPE bigint,
+    ALTER COLUMN paid_amount TYPE bigint,
+    ALTER COLUMN discount TYPE bigint,
+    ALTER COLUMN delivery_charges TYPE bigint;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_sales_summary
+    ON daily_sales_summary (date, COALESCE(payment_type_id, 0), COALESCE(stock_category_id, 0));
+
+
+CREATE OR REPLACE FUNCTION refresh_daily_sales_summary(dates date[]) RETURNS void AS $$
+DECLARE
+    d date;
+BEGIN
+    -- serialize concurrent refreshes of the same day (sorted to avoid deadlocks)
+    FOR d IN SELECT DISTINCT unnest(dates) ORDER BY 1 LOOP
+        PERFORM pg_advisory_xact_lock(hashtext('daily_sales_summary'), d - DATE '2000-01-01');
+    END LOOP;
+
+    DELETE FROM daily_sales_summary WHERE date = ANY(dates);
+
+    -- order level
+    INSERT INTO daily_sales_summary (
+        date, payment_type_id, stock_category_id,
+        orders, quantity, amount, paid_amount, discount, delivery_charges
+    )
+    SELECT
+        o.date::date,
+        o.payment_type_id,
+        NULL,
+        COUNT(*),
+        COALESCE(SUM(o.ttl_quantity), 0),
+        COALESCE(SUM(o.ttl_amount), 0),
+        COALESCE(SUM(o.paid_amount), 0),
+        COALESCE(SUM(o.discount), 0),
+        COALESCE(SUM(o.delivery_charges), 0)
+    FROM
+        orders AS o
+    WHERE
+        o.date::date = ANY(dates)
+    GROUP BY
+        o.date::date, o.payment_type_id;
+
+    -- item level
+    INSERT INTO daily_sales_summary (
+        date, payment_type_id, stock_category_id,
+        orders, quantity, amount
+    )
+    SELECT
+        o.date::date,
+        o.payment_type_id,
+        oi.stock_category_id,
+        COUNT(DISTINCT o.id),
+        COALESCE(SUM(oi.quantity), 0),
+        COALESCE(SUM(oi.amount), 0)
+    FROM
+        orders AS o
+        INNER JOIN order_items AS oi ON oi.order_id = o.id
+    WHERE
+        o.date::date = ANY(dates)
+    GROUP BY
+        o.date::date, o.payment_type_id, oi.stock_category_id;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION rebuild_daily_sales_summary() RETURNS void AS $$
+BEGIN
+    LOCK TABLE daily_sales_summary IN EXCLUSIVE MODE;
+    DELETE FROM daily_sales_summary;
+    PERFORM refresh_daily_sales_summary(ARRAY(SELECT DISTINCT date::date FROM orders));
+END;
+$$ LANGUAGE plpgsql;
+
+
+SELECT rebuild_daily_sales_summary();
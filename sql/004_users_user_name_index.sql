@@ -0,0 +1,4 @@
+-- Login looks up a single user by name (src.user.get_user_by_name)
+
+CREATE INDEX IF NOT EXISTS idx_users_user_name
+    ON users (user_name);
@@ -0,0 +1,7 @@
+-- Delivery queue (src.order.get_undelivered_orders): open deliveries by due date.
+-- Only undelivered orders are indexed, so the index stays the size of the queue
+-- rather than the order history.
+
+CREATE INDEX IF NOT EXISTS idx_orders_undelivered_delivery_date
+    ON orders (delivery_date, id)
+    WHERE NOT is_delivered;
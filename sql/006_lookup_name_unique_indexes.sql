@@ -0,0 +1,14 @@
+-- Case-insensitive unique names for the lookup tables (src.lookup_repository).
+-- add/rename rely on these indexes instead of a separate LOWER(name) check query:
+-- inserts use ON CONFLICT ((LOWER(name))) DO NOTHING, renames catch the unique violation.
+-- Creating an index fails if the table already holds names differing only in case;
+-- rename or merge those rows first.
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payment_types_lower_name
+    ON payment_types (LOWER(name));
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_categories_lower_name
+    ON stock_categories (LOWER(name));
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_expense_types_lower_name
+    ON expense_types (LOWER(name));
@@ -0,0 +1,11 @@
+-- Case-insensitive uniqueness of order numbers and customer serial numbers.
+-- src.order.add_order/update_order and src.customer.add_customer/update_customer write
+-- directly and map a violation of these indexes to the "already exists" warning, instead
+-- of running a separate existence query before the write transaction.
+-- Creating an index fails if duplicates (differing only in case) already exist; fix those first.
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_orders_lower_order_no
+    ON orders (LOWER(order_no));
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_customers_lower_serial_no
+    ON customers (LOWER(serial_no));
@@ -0,0 +1,6 @@
+-- Order numbers for new orders (src.order.add_order), in the existing
+-- YYYYMMDD-NNNNNN-<customer serial no> format. The middle part comes from this sequence
+-- (modulo 1,000,000) instead of the wall-clock HHMMSS, so concurrent cashiers never
+-- collide and no pre-check query is needed. nextval() does not block other sessions.
+
+CREATE SEQUENCE IF NOT EXISTS order_no_seq;
@@ -0,0 +1,17 @@
+-- Customer typeahead (src.customer.typeahead_customers): prefix lookups over serial no,
+-- name and phone. text_pattern_ops lets "LIKE 'abc%'" use a btree range scan regardless
+-- of the database collation. Each index is read in its own order (ORDER BY ... USING ~<~)
+-- up to a small candidate cap, so a short prefix stops after the first few entries.
+
+CREATE INDEX IF NOT EXISTS idx_customers_lower_serial_no_prefix
+    ON customers (LOWER(serial_no) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_customers_lower_name_prefix
+    ON customers (LOWER(name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_customers_phone_prefix
+    ON customers (phone text_pattern_ops);
+
+-- last order date of a customer, for ranking recent buyers first
+CREATE INDEX IF NOT EXISTS idx_orders_customer_id_date
+    ON orders (customer_id, date DESC);
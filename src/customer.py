@@ -1,88 +1,209 @@
 import streamlit as st
-import pandas as pd
 from sqlalchemy import text
 import src.utils as utils
+import src.query_cache as query_cache
+import src.search as search
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+postgresql = utils.get_postgresql_connection()
+
+
+def _customer_filter(search_term: str=""):
+    # (condition, order by, params); search results are ranked by how well they match
+    if search_term:
+        return (
+            search.customer_search_condition(),
+            f"{search.customer_search_rank()} DESC, id DESC",
+            search.search_params(search_term)
+        )
+
+    return "TRUE", "id DESC", {}
+
+
+def get_customers_page(search_term: str="", page: int=1, page_size: int=20):
+    condition, order_by, params = _customer_filter(search_term)
+    params["limit"] = page_size
+    params["offset"] = (max(page, 1) - 1) * page_size
+
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                f"""
+                SELECT 
+                    * 
+                FROM 
+                    customers 
+                WHERE 
+                    {condition}
+                ORDER BY 
+                    {order_by}
+                LIMIT :limit
+                OFFSET :offset;
+                """
+            ),
+            params
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+def count_customers(search_term: str=""):
+    condition, _, params = _customer_filter(search_term)
+
+    with postgresql.session as session:
+        result = session.execute(
+            text(f"SELECT COUNT(*) FROM customers WHERE {condition};"),
+            params
+        )
+
+        return result.scalar()
 
 
 def get_customers(search_term: str="", limit: int=None):
+    condition, order_by, params = _customer_filter(search_term)
+    params["limit"] = limit
+
     with postgresql.session as session:
-        if search_term:
-            result = session.execute(
-                text(
-                    """
-                    SELECT 
-                        * 
-                    FROM 
-                        customers 
-                    WHERE 
-                        serial_no ILIKE :search_term 
-                        OR name ILIKE :search_term
-                        OR phone ILIKE :search_term
-                        OR home_address ILIKE :search_term
-                        OR delivery_address ILIKE :search_term
-                        OR city ILIKE :search_term
-                        OR state_region ILIKE :search_term
-                        OR country ILIKE :search_term
-                    ORDER BY 
-                        id DESC;
-                    """
-                ),
-                {"search_term": f"%{search_term}%"}
-            )
-        else:
-            result = session.execute(
-                text("SELECT * FROM customers ORDER BY id DESC;")
-            )
+        result = session.execute(
+            text(
+                f"""
+                SELECT 
+                    * 
+                FROM 
+                    customers 
+                WHERE 
+                    {condition}
+                ORDER BY 
+                    {order_by}
+                LIMIT :limit;
+                """
+            ),
+            params
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df if limit is None else df.iloc[:limit]
 
+# Typeahead for picking a customer while entering an order: prefix matches on serial no,
+# name and phone (sql/009_customer_typeahead_indexes.sql), at most typeahead_limit rows,
+# exact serial no first, then the most recent buyers. Results are cached per term.
+# Each prefix index contributes at most typeahead_candidates rows, read in index order,
+# so a short prefix does not probe the last order date of every matching customer.
+typeahead_limit = 10
+typeahead_candidates = 50
+
+_typeahead_columns = """
+    c.id,
+    c.serial_no,
+    c.name,
+    c.phone,
+    c.delivery_address,
+    c.city,
+    c.state_region
+"""
+
+
+@query_cache.cached_query(tables=("customers", "orders"), ttl=300, maxsize=256)
+def typeahead_customers(search_term: str, limit: int=typeahead_limit):
+    params = search.prefix_params(search_term)
+    params["limit"] = min(limit, typeahead_limit)
+    params["candidates"] = typeahead_candidates
 
-def get_customer_by_id(id: int):
     with postgresql.session as session:
         result = session.execute(
-            text("SELECT * FROM customers WHERE id = :id;"),
-            {"id": id}
+            text(
+                f"""
+                SELECT 
+                    {_typeahead_columns}
+                FROM 
+                    (
+                        (
+                            SELECT id FROM customers
+                            WHERE LOWER(serial_no) LIKE :prefix_term
+                            ORDER BY LOWER(serial_no) USING ~<~
+                            LIMIT :candidates
+                        )
+                        UNION
+                        (
+                            SELECT id FROM customers
+                            WHERE LOWER(name) LIKE :prefix_term
+                            ORDER BY LOWER(name) USING ~<~
+                            LIMIT :candidates
+                        )
+                        UNION
+                        (
+                            SELECT id FROM customers
+                            WHERE phone LIKE :prefix_term
+                            ORDER BY phone USING ~<~
+                            LIMIT :candidates
+                        )
+                    ) AS m
+                    INNER JOIN customers AS c ON c.id = m.id
+                    LEFT JOIN LATERAL (
+                        SELECT MAX(o.date) AS last_order_date
+                        FROM orders AS o
+                        WHERE o.customer_id = c.id
+                    ) AS lo ON true
+                ORDER BY 
+                    (LOWER(c.serial_no) = :exact_term) DESC,
+                    lo.last_order_date DESC NULLS LAST,
+                    c.serial_no
+                LIMIT :limit;
+                """
+            ),
+            params
         )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
 
 
-def customer_exists(serial_no: str, name: str, exclude_id: int=None):
+@query_cache.cached_query(tables=("customers", "orders"), ttl=300, maxsize=1)
+def get_recent_customers(limit: int=typeahead_limit):
+    # hot customers: the latest buyers, shown before anything is typed
     with postgresql.session as session:
-        if exclude_id:
-            result = session.execute(
-                text(
-                    """
-                    SELECT 1 
-                    FROM customers 
-                    WHERE 
-                        LOWER(serial_no) = LOWER(:serial_no)
-                        AND id != :id;
-                    """
-                ), 
-                {"id": exclude_id, "serial_no": serial_no, "name": name}
-            )
-        else:
-            result = session.execute(
-                text("SELECT 1 FROM customers WHERE LOWER(serial_no) = LOWER(:serial_no);"), 
-                {"serial_no": serial_no, "name": name}
-            )
+        result = session.execute(
+            text(
+                f"""
+                SELECT 
+                    {_typeahead_columns}
+                FROM 
+                    (
+                        SELECT customer_id, MAX(date) AS last_order_date
+                        FROM (
+                            SELECT customer_id, date 
+                            FROM orders 
+                            ORDER BY date DESC, id DESC 
+                            LIMIT 200
+                        ) AS latest
+                        GROUP BY customer_id
+                    ) AS r
+                    INNER JOIN customers AS c ON c.id = r.customer_id
+                ORDER BY 
+                    r.last_order_date DESC
+                LIMIT :limit;
+                """
+            ),
+            {"limit": min(limit, typeahead_limit)}
+        )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df.shape[0] > 0
+        df = utils.fetch_dataframe(result)
+        return df
 
 
-def add_customer(serial_no: str, name: str, phone: str, home_address: str, delivery_address: str, city: str, state_region: str, country: str):
-    if customer_exists(serial_no, name):
-        st.warning("Serial No/Name already exists.")
-        return False
+def get_customer_by_id(id: int):
+    with postgresql.session as session:
+        result = session.execute(
+            text("SELECT * FROM customers WHERE id = :id;"),
+            {"id": id}
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
 
+def add_customer(serial_no: str, name: str, phone: str, home_address: str, delivery_address: str, city: str, state_region: str, country: str):
     with postgresql.session as session:
         try:
             result = session.execute(
@@ -128,18 +249,19 @@ def add_customer(serial_no: str, name: str, phone: str, home_address: str, deliv
                 raise Exception("Cannot insert a customer.")
             
             session.commit()
+            query_cache.bump_tables("customers")
             return {"success": True, "new_id": new_id}
         except Exception as e:
-            print("Error occurred while inserting a customer: ", e)
             session.rollback()
+            # duplicate serial numbers are rejected by uq_customers_lower_serial_no
+            if utils.is_unique_violation(e, "uq_customers_lower_serial_no"):
+                st.warning("Serial No/Name already exists.")
+                return {"success": False, "error": "Serial No/Name already exists."}
+            print("Error occurred while inserting a customer: ", e)
             return {"success": False, "error": e}
 
 
 def update_customer(id: int, serial_no: str, name: str, phone: str, home_address: str, delivery_address: str, city: str, state_region: str, country: str):
-    if customer_exists(serial_no, name, exclude_id=id):
-        st.warning("Serial No/Name already exists.")
-        return False
-
     with postgresql.session as session:
         try:
             session.execute(
@@ -173,10 +295,15 @@ def update_customer(id: int, serial_no: str, name: str, phone: str, home_address
                 }
             )
             session.commit()
+            query_cache.bump_tables("customers")
             return {"success": True}
         except Exception as e:
-            print("Error occurred while updating a customer: ", e)
             session.rollback()
+            # duplicate serial numbers are rejected by uq_customers_lower_serial_no
+            if utils.is_unique_violation(e, "uq_customers_lower_serial_no"):
+                st.warning("Serial No/Name already exists.")
+                return {"success": False, "error": "Serial No/Name already exists."}
+            print("Error occurred while updating a customer: ", e)
             return {"success": False, "error": e}
 
 
@@ -188,6 +315,7 @@ def delete_customer(id: int):
                 {"id": id}
             )
             session.commit()
+            query_cache.bump_tables("customers")
             return {"success": True}
         except Exception as e:
             print("Error occurred while deleting a customer: ", e)
@@ -1,12 +1,10 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, date, timedelta
 from sqlalchemy import text, bindparam
 import src.utils as utils
+import src.query_cache as query_cache
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+postgresql = utils.get_postgresql_connection()
 
 
 def get_expenses(from_date: date, to_date: date, search_term: str=""):
@@ -55,7 +53,7 @@ def get_expenses(from_date: date, to_date: date, search_term: str=""):
                 }
             )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
 
 
@@ -93,6 +91,7 @@ def add_expense(expense: dict):
                 raise Exception("Cannot insert an expense.")
 
             session.commit()
+            query_cache.bump_tables("expenses")
             return True
         except Exception as e:
             print("Error occurred while inserting an expense: ", e)
@@ -127,6 +126,7 @@ def update_expense(expense: dict):
             )
   
             session.commit()
+            query_cache.bump_tables("expenses")
             return True
         except Exception as e:
             print("Error occurred while updating an expense: ", e)
@@ -143,6 +143,7 @@ def delete_expense(id: int):
             )
 
             session.commit()
+            query_cache.bump_tables("expenses")
             return True
         except Exception as e:
             print("Error occurred while deleting an expense: ", e)
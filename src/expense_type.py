@@ -1,79 +1,11 @@
-import streamlit as st
-import pandas as pd
-from sqlalchemy import text
-import src.utils as utils
+from src.lookup_repository import LookupRepository
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+_repository = LookupRepository("expense_types")
 
-
-def get_expense_types(search_term: str=""):
-    with postgresql.session as session:
-        if search_term:
-            result = session.execute(
-                text("SELECT * FROM expense_types WHERE name ILIKE :search_term ORDER BY name;"),
-                {"search_term": f"%{search_term}%"}
-            )
-        else:
-            result = session.execute(
-                text("SELECT * FROM expense_types ORDER BY name;")
-            )
-        
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df
-
-
-def name_exists(name: str, exclude_id: int=None):
-    with postgresql.session as session:
-        if exclude_id:
-            result = session.execute(
-                text("SELECT 1 FROM expense_types WHERE LOWER(name) = LOWER(:name) AND id != :id;"),
-                {"id": exclude_id, "name": name}
-            )
-        else:
-            result = session.execute(
-                text("SELECT 1 FROM expense_types WHERE LOWER(name) = LOWER(:name);"),
-                {"name": name}
-            )
-        
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df.shape[0] > 0
-
-
-def add_expense_type(name: str):
-    if name_exists(name):
-        st.warning("Name already exists.")
-        return False
-    
-    with postgresql.session as session:
-        session.execute(
-            text("INSERT INTO expense_types (name) VALUES (:name);"),
-            {"name": name}
-        )
-        session.commit()
-        return True
-
-
-def update_expense_type(id: int, name: str):
-    if name_exists(name, exclude_id=id):
-        st.warning("Name already exists.")
-        return False
-    
-    with postgresql.session as session:
-        session.execute(
-            text("UPDATE expense_types SET name = :name WHERE id = :id;"),
-            {"id": id, "name": name}
-        )
-        session.commit()
-        return True
-    
-
-def delete_expense_type(id: int):
-    with postgresql.session as session:
-        session.execute(
-            text("DELETE FROM expense_types WHERE id = :id;"),
-            {"id": id}
-        )
-        session.commit()
-        return True
+get_expense_types = _repository.get_all
+get_expense_type_lookup = _repository.get_lookup
+add_expense_type = _repository.add
+add_expense_types = _repository.add_many
+update_expense_type = _repository.update
+rename_expense_types = _repository.rename_many
+delete_expense_type = _repository.delete
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Process-wide LRU cache of Plotly figures for the report pages.
+# A figure is keyed by its chart name, a fingerprint of the aggregated frame it is drawn
+# from and its chart parameters, so an unchanged chart is not rebuilt on every rerun.
+# The cache is capped by an estimate of the size of the figures it holds: the memory
+# footprint of the frame a figure is drawn from plus a fixed allowance for its layout
+# and template, so a miss does not encode the figure just to measure it.
+
+_max_bytes = 64 * 1024 * 1024
+_figure_overhead_bytes = 16 * 1024
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def fingerprint(df: pd.DataFrame, *params):
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def estimate_size(df: pd.DataFrame):
+    return _figure_overhead_bytes + int(df.memory_usage(index=True, deep=True).sum())
+
+
+def cached_figure(name: str, df: pd.DataFrame, build, *params):
+    # build() is only called on a miss; params are whatever else the chart depends on
+    global _size
+    key = (name, fingerprint(df, *params))
+
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[0]
+        _stats["misses"] += 1
+
+    fig = build()
+    size = estimate_size(df)
+
+    with _lock:
+        if key not in _figures and size <= _max_bytes:
+            _figures[key] = (fig, size)
+            _size += size
+            while _size > _max_bytes:
+                _, (_, evicted_size) = _figures.popitem(last=False)
+                _size -= evicted_size
+                _stats["evictions"] += 1
+
+    return fig
+
+
+def get_figure_cache_stats():
+    with _lock:
+        return {**_stats, "figures": len(_figures), "bytes": _size}
@@ -0,0 +1,45 @@
+import src.utils as utils
+
+# KPIs for the report pages, computed from the order-level rows of the daily sales
+# summary (src.report.get_daily_sales_summary) so every total is a single column sum.
+
+_summary_columns = ["orders", "quantity", "paid_amount", "delivery_charges", "discount"]
+
+
+def _period_totals(sales_data, expenses_data=None):
+    totals = {
+        "orders": 0,
+        "quantity": 0,
+        "revenue": 0,
+        "delivery_charges": 0,
+        "discount": 0,
+        "expenses": 0
+    }
+
+    if sales_data is not None and sales_data.shape[0]:
+        sales = sales_data[_summary_columns].sum()
+        totals["orders"] = sales["orders"]
+        totals["quantity"] = sales["quantity"]
+        totals["revenue"] = sales["paid_amount"]
+        totals["delivery_charges"] = sales["delivery_charges"]
+        totals["discount"] = sales["discount"]
+
+    if expenses_data is not None and expenses_data.shape[0]:
+        totals["expenses"] = expenses_data["amount"].sum()
+
+    return totals
+
+
+def compute_kpis(sales_data, prev_sales_data, expenses_data=None, prev_expenses_data=None):
+    # {kpi: {"current": ..., "previous": ..., "delta": percentage change}}
+    current = _period_totals(sales_data, expenses_data)
+    previous = _period_totals(prev_sales_data, prev_expenses_data)
+
+    return {
+        name: {
+            "current": current[name],
+            "previous": previous[name],
+            "delta": utils.percentage_change(current[name], previous[name])
+        }
+        for name in current
+    }
@@ -0,0 +1,34 @@
+import threading
+import src.query_cache as query_cache
+
+# Process-wide cache of the small lookup tables (payment types, stock categories, expense types)
+# as an ordered list of names plus id <-> name maps, shared by every Streamlit session.
+# An entry remembers the table version it was built from, so the query_cache.bump_tables()
+# call in the table's add/update/delete functions invalidates it.
+# Lookups are shared: callers must not modify them.
+
+_lock = threading.Lock()
+_lookups = {}
+
+
+def get_lookup(table: str, load):
+    # load() returns the table's rows (id, name) in option order; it only runs on a miss
+    stamp = query_cache.version_stamp((table,))
+    with _lock:
+        entry = _lookups.get(table)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    df = load()
+    ids = [int(id) for id in df["id"]]
+    names = df["name"].tolist()
+    lookup = {
+        "options": names,
+        "id_by_name": dict(zip(names, ids)),
+        "name_by_id": dict(zip(ids, names))
+    }
+
+    with _lock:
+        _lookups[table] = (stamp, lookup)
+    return lookup
+
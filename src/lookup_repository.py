@@ -0,0 +1,112 @@
+import streamlit as st
+from sqlalchemy import text
+import src.utils as utils
+import src.query_cache as query_cache
+import src.statements as statements
+import src.lookup_cache as lookup_cache
+
+postgresql = utils.get_postgresql_connection()
+
+# Read/write access to a lookup table of (id, name) rows with a case-insensitive unique
+# index on LOWER(name) (sql/006_lookup_name_unique_indexes.sql). Each write is a single
+# statement: duplicates are rejected by the index, not by a separate existence query.
+
+
+class LookupRepository:
+    def __init__(self, table: str):
+        self.table = table
+        self.unique_index = f"uq_{table}_lower_name"
+        self._all_statement = statements.register(f"{table}_all", f"SELECT * FROM {table} ORDER BY name;", prepare=True)
+
+    def get_all(self, search_term: str=""):
+        with postgresql.session as session:
+            if search_term:
+                result = session.execute(
+                    text(f"SELECT * FROM {self.table} WHERE name ILIKE :search_term ORDER BY name;"),
+                    {"search_term": f"%{search_term}%"}
+                )
+            else:
+                result = statements.execute(session, self._all_statement)
+
+            df = utils.fetch_dataframe(result)
+            return df
+
+    def get_lookup(self):
+        # cached options and id <-> name maps for forms; rebuilt after any write to the table
+        return lookup_cache.get_lookup(self.table, self.get_all)
+
+    def add(self, name: str):
+        ids = self.add_many([name])
+        if ids is None:
+            return False
+        if not ids:
+            st.warning("Name already exists.")
+            return False
+        return True
+
+    def add_many(self, names: list):
+        # -> {name: new id} for the names inserted; names that already exist are skipped
+        with postgresql.session as session:
+            try:
+                result = session.execute(
+                    text(
+                        f"""
+                        INSERT INTO {self.table} (name)
+                        SELECT DISTINCT ON (LOWER(name)) name FROM unnest(CAST(:names AS text[])) AS name
+                        ON CONFLICT ((LOWER(name))) DO NOTHING
+                        RETURNING id, name;
+                        """
+                    ),
+                    {"names": list(names)}
+                )
+                ids = {row.name: row.id for row in result}
+
+                session.commit()
+                query_cache.bump_tables(self.table)
+                return ids
+            except Exception as e:
+                print(f"Error occurred while inserting into {self.table}: ", e)
+                session.rollback()
+                return None
+
+    def update(self, id: int, name: str):
+        return self.rename_many({id: name})
+
+    def rename_many(self, names_by_id: dict):
+        with postgresql.session as session:
+            try:
+                session.execute(
+                    text(
+                        f"""
+                        UPDATE {self.table} AS t
+                        SET name = v.name
+                        FROM unnest(CAST(:ids AS bigint[]), CAST(:names AS text[])) AS v(id, name)
+                        WHERE t.id = v.id;
+                        """
+                    ),
+                    {
+                        "ids": [int(id) for id in names_by_id.keys()],
+                        "names": list(names_by_id.values())
+                    }
+                )
+
+                session.commit()
+                query_cache.bump_tables(self.table)
+                return True
+            except Exception as e:
+                session.rollback()
+                if utils.is_unique_violation(e, self.unique_index):
+                    st.warning("Name already exists.")
+                else:
+                    print(f"Error occurred while updating {self.table}: ", e)
+                return False
+
+    def delete(self, id: int):
+        with postgresql.session as session:
+            session.execute(
+                text(f"DELETE FROM {self.table} WHERE id = :id;"), 
+                {"id": id}
+            )
+            session.commit()
+            query_cache.bump_tables(self.table)
+            return True
@@ -3,66 +3,138 @@ import pandas as pd
 from datetime import datetime, date, timedelta
 from sqlalchemy import text, bindparam
 import src.utils as utils
+import src.query_cache as query_cache
+import src.search as search
+import src.statements as statements
+
+postgresql = utils.get_postgresql_connection()
+
+
+_order_conditions = {
+    "date": "date BETWEEN :from_date AND :to_date",
+    "search": search.order_search_condition()
+}
+
+# order list: one prepared statement per filter mode, first page and following pages
+_orders_page_statements = {
+    (mode, has_cursor): statements.register(
+        f"orders_page_{mode}" + ("_after" if has_cursor else ""),
+        f"""
+        SELECT 
+            *
+        FROM 
+            v_orders
+        WHERE
+            {condition}
+            {"AND (date, id) < (:after_date, :after_id)" if has_cursor else ""}
+        ORDER BY 
+            date DESC, id DESC
+        LIMIT :page_size;
+        """,
+        prepare=True
+    )
+    for mode, condition in _order_conditions.items()
+    for has_cursor in (False, True)
+}
+
+_orders_count_statements = {
+    mode: statements.register(
+        f"orders_count_{mode}",
+        f"""
+        SELECT 
+            COUNT(*) 
+        FROM 
+            v_orders
+        WHERE
+            {condition};
+        """,
+        prepare=True
+    )
+    for mode, condition in _order_conditions.items()
+}
+
+# items of a set of orders, fetched in the same session as the orders themselves
+_items_by_order_statement = statements.register(
+    "order_items_by_order",
+    """
+    SELECT 
+        *
+    FROM 
+        v_order_items
+    WHERE
+        order_id = ANY(:order_ids)
+    ORDER BY 
+        order_id, id;
+    """,
+    prepare=True
+)
+
+
+def _order_filter(dt: date, search_term: str=""):
+    if search_term:
+        return "search", search.search_params(search_term)
+
+    return "date", {
+        "from_date": dt.strftime("%Y-%m-%d") + " 00:00:00",
+        "to_date": dt.strftime("%Y-%m-%d") + " 23:59:59"
+    }
+
+
+def _items_by_order(session, order_ids: list):
+    # {order id: items frame}; orders without items get an empty frame with the item columns
+    order_ids = [int(id) for id in order_ids]
+    result = statements.execute(session, _items_by_order_statement, {"order_ids": order_ids})
+    items = utils.fetch_dataframe(result)
+
+    grouped = {int(id): group.reset_index(drop=True) for id, group in items.groupby("order_id", sort=False)}
+    return {id: grouped.get(id, items.iloc[0:0]) for id in order_ids}
+
+
+def get_orders_page(dt: date, search_term: str="", page_size: int=5, after: tuple=None):
+    # keyset pagination on (date DESC, id DESC); after = (date, id) of the last row of the previous page
+    # returns the page of orders and their items indexed by order id
+    mode, params = _order_filter(dt, search_term)
+    if after is not None:
+        params["after_date"], params["after_id"] = after
+    params["page_size"] = page_size
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+    with postgresql.session as session:
+        result = statements.execute(session, _orders_page_statements[(mode, after is not None)], params)
 
+        df = utils.fetch_dataframe(result)
+        return df, _items_by_order(session, df["id"].tolist())
 
-def get_orders(dt: date, search_term: str=""):
-    if dt is not None:
-        from_date = dt.strftime("%Y-%m-%d") + " 00:00:00"
-        to_date = dt.strftime("%Y-%m-%d") + " 23:59:59"
+
+def count_orders(dt: date, search_term: str=""):
+    mode, params = _order_filter(dt, search_term)
 
     with postgresql.session as session:
-        if search_term:
-            result = session.execute(
-                text(
-                    """
-                    SELECT 
-                        *
-                    FROM 
-                        v_orders
-                    WHERE
-                        order_no ILIKE :search_term
-                        OR customer_serial_no ILIKE :search_term
-                        OR customer_name ILIKE :search_term
-                        OR customer_phone ILIKE :search_term
-                        OR customer_city ILIKE :search_term
-                        OR customer_state_region ILIKE :search_term
-                        OR customer_country ILIKE :search_term
-                        OR payment_type_name ILIKE :search_term
-                        OR delivery_address ILIKE :search_term
-                    ORDER BY 
-                        date DESC, id DESC;
-                    """
-                ),
-                {
-                    "search_term": f"%{search_term}%"
-                }
-            )
+        result = statements.execute(session, _orders_count_statements[mode], params)
+
+        return result.scalar()
 
-        else:
-            result = session.execute(
-                text(
-                    """
-                    SELECT 
-                        * 
-                    FROM 
-                        v_orders
-                    WHERE
-                        date BETWEEN :from_date AND :to_date
-                    ORDER BY 
-                        date DESC, id DESC;
-                    """
-                ),
-                {
-                    "from_date": from_date,
-                    "to_date": to_date
-                }
-            )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+def get_orders(dt: date, search_term: str=""):
+    mode, params = _order_filter(dt, search_term)
+
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                f"""
+                SELECT 
+                    * 
+                FROM 
+                    v_orders
+                WHERE
+                    {_order_conditions[mode]}
+                ORDER BY 
+                    date DESC, id DESC;
+                """
+            ),
+            params
+        )
+
+        df = utils.fetch_dataframe(result)
         return df
 
 
@@ -84,10 +156,41 @@ def get_order_by_id(id: int):
             }
         )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
 
 
+def get_orders_with_items(order_ids: list=None, dt: date=None):
+    # the given orders (or every order of the date) and their items indexed by order id
+    if order_ids is not None:
+        condition, params = "o.id = ANY(:order_ids)", {"order_ids": [int(id) for id in order_ids]}
+    else:
+        condition, params = "o.date BETWEEN :from_date AND :to_date", {
+            "from_date": dt.strftime("%Y-%m-%d") + " 00:00:00",
+            "to_date": dt.strftime("%Y-%m-%d") + " 23:59:59"
+        }
+
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                f"""
+                SELECT 
+                    *
+                FROM 
+                    v_orders AS o
+                WHERE
+                    {condition}
+                ORDER BY 
+                    o.date, o.id;
+                """
+            ),
+            params
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df, _items_by_order(session, df["id"].tolist())
+
+
 def get_order_items(dt: date, order_ids: list):
     if dt is not None:
         from_date = dt.strftime("%Y-%m-%d") + " 00:00:00"
@@ -131,46 +234,27 @@ def get_order_items(dt: date, order_ids: list):
                 }
             )
     
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
 
 
-def order_no_exists(order_no: str, exclude_id: int=None):
-    with postgresql.session as session:
-        if exclude_id:
-            result = session.execute(
-                text(
-                    """
-                    SELECT 1 
-                    FROM orders
-                    WHERE 
-                        LOWER(order_no) = LOWER(:order_no)
-                        AND id != :id;
-                    """
-                ), 
-                {"id": exclude_id, "order_no": order_no}
-            )
-        else:
-            result = session.execute(
-                text("SELECT 1 FROM orders WHERE LOWER(order_no) = LOWER(:order_no);"), 
-                {"order_no": order_no}
-            )
-
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df.shape[0] > 0
+# order_no of a new order, allocated by the INSERT itself: YYYYMMDD-NNNNNN-<customer serial no>
+# with NNNNNN taken from order_no_seq (sql/008_order_no_sequence.sql)
+_allocate_order_no_sql = """
+    to_char(CAST(:date AS date), 'YYYYMMDD')
+    || '-' || lpad((nextval('order_no_seq') % 1000000)::text, 6, '0')
+    || '-' || (SELECT serial_no FROM customers WHERE id = :customer_id)
+"""
 
 
 def add_order(order: dict, order_items: list):
-    if order_no_exists(order["order_no"]):
-        st.warning("Order No. already exists.")
-        return False
-
+    # order["order_no"] is normally None and allocated from the sequence; an explicit one is kept
     with postgresql.session as session:
         try:
             # order
             result = session.execute(
                 text(
-                    """
+                    f"""
                     INSERT INTO orders (
                         date, 
                         order_no, 
@@ -189,7 +273,7 @@ def add_order(order: dict, order_items: list):
                     )
                     VALUES (
                         :date, 
-                        :order_no, 
+                        COALESCE(:order_no, {_allocate_order_no_sql}), 
                         :customer_id, 
                         :ttl_quantity, 
                         :ttl_amount, 
@@ -208,7 +292,7 @@ def add_order(order: dict, order_items: list):
                 ), 
                 {
                     "date": order["date"], 
-                    "order_no": order["order_no"], 
+                    "order_no": order.get("order_no"), 
                     "customer_id": order["customer_id"], 
                     "ttl_quantity": order["ttl_quantity"], 
                     "ttl_amount": order["ttl_amount"], 
@@ -229,24 +313,33 @@ def add_order(order: dict, order_items: list):
                 raise Exception("Cannot insert an order.")
 
             # order_items
-            for item in order_items:
-                add_order_item(session, order_id=new_id, item=item)
+            add_order_items(session, order_id=new_id, items=order_items)
+
+            # daily_sales_summary
+            refresh_daily_sales_summary(session, dates=[order["date"]])
 
             session.commit()
+            query_cache.bump_tables("orders", "order_items", "daily_sales_summary")
             return True
         except Exception as e:
-            print("Error occurred while inserting an order: ", e)
             session.rollback()
+            # duplicate order numbers are rejected by uq_orders_lower_order_no
+            if utils.is_unique_violation(e, "uq_orders_lower_order_no"):
+                st.warning("Order No. already exists.")
+            else:
+                print("Error occurred while inserting an order: ", e)
             return False
 
 
 def update_order(order: dict, order_items: list):
-    if order_no_exists(order["order_no"], exclude_id=order["id"]):
-        st.warning("Order No. already exists.")
-        return False
-
     with postgresql.session as session:
         try:
+            # previous date, for the daily_sales_summary refresh
+            old_date = session.execute(
+                text("SELECT date FROM orders WHERE id = :id FOR UPDATE;"),
+                {"id": order["id"]}
+            ).scalar()
+
             # order
             session.execute(
                 text(
@@ -292,15 +385,21 @@ def update_order(order: dict, order_items: list):
             )
 
             # order_items
-            delete_order_items(session, order_id=order["id"])
-            for item in order_items:
-                add_order_item(session, order_id=order["id"], item=item)
+            sync_order_items(session, order_id=order["id"], items=order_items)
+
+            # daily_sales_summary
+            refresh_daily_sales_summary(session, dates=[d for d in (old_date, order["date"]) if d is not None])
             
             session.commit()
+            query_cache.bump_tables("orders", "order_items", "daily_sales_summary")
             return True
         except Exception as e:
-            print("Error occurred while updating an order: ", e)
             session.rollback()
+            # duplicate order numbers are rejected by uq_orders_lower_order_no
+            if utils.is_unique_violation(e, "uq_orders_lower_order_no"):
+                st.warning("Order No. already exists.")
+            else:
+                print("Error occurred while updating an order: ", e)
             return False
 
 
@@ -311,12 +410,17 @@ def delete_order(id: int):
             delete_order_items(session, order_id=id)
 
             # order
-            session.execute(
-                text("DELETE FROM orders WHERE id = :id;"), 
+            old_date = session.execute(
+                text("DELETE FROM orders WHERE id = :id RETURNING date;"), 
                 {"id": id}
-            )
+            ).scalar()
+
+            # daily_sales_summary
+            if old_date is not None:
+                refresh_daily_sales_summary(session, dates=[old_date])
 
             session.commit()
+            query_cache.bump_tables("orders", "order_items", "daily_sales_summary")
             return True
         except Exception as e:
             print("Error occurred while deleting an order: ", e)
@@ -324,7 +428,31 @@ def delete_order(id: int):
             return False
 
 
-def add_order_item(session, order_id: int, item: dict):
+_item_fields = ["stock_category_id", "quantity", "amount", "description", "price", "extra"]
+
+
+def _item_id(item: dict):
+    # items added in the form (or as new editor rows) have no id yet
+    id = item.get("id")
+    return None if id is None or pd.isna(id) else int(id)
+
+
+def _item_arrays(items: list):
+    return {
+        "stock_category_ids": [int(item["stock_category_id"]) for item in items],
+        "quantities": [item["quantity"] for item in items],
+        "amounts": [item["amount"] for item in items],
+        "descriptions": [item["description"] for item in items],
+        "prices": [item["price"] for item in items],
+        "extras": [item["extra"] for item in items]
+    }
+
+
+def add_order_items(session, order_id: int, items: list):
+    # one multi-row INSERT for all items
+    if not items:
+        return
+
     session.execute(
         text(
             """
@@ -337,29 +465,99 @@ def add_order_item(session, order_id: int, item: dict):
                 price,
                 extra
             )
-            VALUES (
-                :order_id, 
-                :stock_category_id, 
-                :quantity, 
-                :amount,
-                :description,
-                :price,
-                :extra
-            );
+            SELECT
+                :order_id,
+                v.stock_category_id,
+                v.quantity,
+                v.amount,
+                v.description,
+                v.price,
+                v.extra
+            FROM 
+                unnest(
+                    CAST(:stock_category_ids AS bigint[]),
+                    CAST(:quantities AS numeric[]),
+                    CAST(:amounts AS numeric[]),
+                    CAST(:descriptions AS text[]),
+                    CAST(:prices AS numeric[]),
+                    CAST(:extras AS numeric[])
+                ) AS v(stock_category_id, quantity, amount, description, price, extra);
             """
         ), 
-        {
-            "order_id": order_id, 
-            "stock_category_id": item["stock_category_id"], 
-            "quantity": item["quantity"], 
-            "amount": item["amount"],
-            "description": item["description"],
-            "price": item["price"],
-            "extra": item["extra"]
-        }
+        {"order_id": order_id, **_item_arrays(items)}
     )
 
 
+def sync_order_items(session, order_id: int, items: list):
+    # writes only the difference between the stored items and the submitted ones
+    result = session.execute(
+        text(
+            """
+            SELECT 
+                id, stock_category_id, quantity, amount, description, price, extra
+            FROM 
+                order_items 
+            WHERE 
+                order_id = :order_id
+            FOR UPDATE;
+            """
+        ), 
+        {"order_id": order_id}
+    )
+    existing = {row["id"]: row for row in result.mappings()}
+
+    to_insert, to_update, kept_ids = [], [], set()
+    for item in items:
+        id = _item_id(item)
+        if id not in existing or id in kept_ids:
+            to_insert.append(item)
+            continue
+
+        kept_ids.add(id)
+        if any(existing[id][field] != item[field] for field in _item_fields):
+            to_update.append({**item, "id": id})
+    to_delete = [id for id in existing if id not in kept_ids]
+
+    if to_delete:
+        session.execute(
+            text("DELETE FROM order_items WHERE id = ANY(:ids);"), 
+            {"ids": to_delete}
+        )
+
+    if to_update:
+        session.execute(
+            text(
+                """
+                UPDATE 
+                    order_items AS oi
+                SET
+                    stock_category_id = v.stock_category_id,
+                    quantity = v.quantity,
+                    amount = v.amount,
+                    description = v.description,
+                    price = v.price,
+                    extra = v.extra
+                FROM 
+                    unnest(
+                        CAST(:ids AS bigint[]),
+                        CAST(:stock_category_ids AS bigint[]),
+                        CAST(:quantities AS numeric[]),
+                        CAST(:amounts AS numeric[]),
+                        CAST(:descriptions AS text[]),
+                        CAST(:prices AS numeric[]),
+                        CAST(:extras AS numeric[])
+                    ) AS v(id, stock_category_id, quantity, amount, description, price, extra)
+                WHERE
+                    oi.id = v.id
+                    AND oi.order_id = :order_id;
+                """
+            ), 
+            {"order_id": order_id, "ids": [item["id"] for item in to_update], **_item_arrays(to_update)}
+        )
+
+    add_order_items(session, order_id=order_id, items=to_insert)
+
+
 def delete_order_items(session, order_id: int):
     session.execute(
         text("DELETE FROM order_items WHERE order_id = :order_id;"), 
@@ -367,50 +565,58 @@ def delete_order_items(session, order_id: int):
     )
 
 
+def refresh_daily_sales_summary(session, dates: list):
+    # recomputes the rollup rows of the given dates; see sql/003_daily_sales_summary.sql
+    session.execute(
+        text("SELECT refresh_daily_sales_summary(CAST(:dates AS date[]));"),
+        {"dates": list(dates)}
+    )
+
+
 # delivery
+# delivery queue: only the fields the Delivery cards show, read from orders through the
+# partial index on undelivered orders (sql/005_delivery_queue_index.sql)
+def _delivery_queue_sql(condition: str):
+    return f"""
+    SELECT
+        o.id,
+        o.date,
+        o.delivery_date,
+        o.order_no,
+        c.serial_no AS customer_serial_no,
+        c.name AS customer_name,
+        o.measurement
+    FROM
+        orders AS o
+        INNER JOIN customers AS c ON c.id = o.customer_id
+    WHERE
+        NOT o.is_delivered
+        AND
+        {condition}
+    ORDER BY
+        o.delivery_date ASC, o.id;
+    """
+
+
+_undelivered_due_statement = statements.register(
+    "undelivered_due",
+    _delivery_queue_sql("o.delivery_date <= :due_date"),
+    prepare=True
+)
+
+
 def get_undelivered_orders(due_date: date=None, order_date_from: date=None, order_date_to: date=None, search_term: str=None):
     today = datetime.now().strftime("%Y-%m-%d")
 
     with postgresql.session as session:
         # Due Date
         if due_date:
-            result = session.execute(
-                text(
-                    """
-                    SELECT
-                        *
-                    FROM
-                        v_orders
-                    WHERE
-                        is_delivered = false
-                        AND
-                        delivery_date <= :due_date
-                    ORDER BY
-                        delivery_date ASC;
-                    """
-                ),
-                {
-                    "due_date": due_date
-                }
-            )
+            result = statements.execute(session, _undelivered_due_statement, {"due_date": due_date})
 
         # Order Date Range
         elif order_date_from and order_date_to:
             result = session.execute(
-                text(
-                    """
-                    SELECT
-                        *
-                    FROM
-                        v_orders
-                    WHERE
-                        is_delivered = false
-                        AND
-                        date BETWEEN :from_date AND :to_date
-                    ORDER BY
-                        delivery_date ASC;
-                    """
-                ),
+                text(_delivery_queue_sql("o.date BETWEEN :from_date AND :to_date")),
                 {
                     "from_date": order_date_from,
                     "to_date": order_date_to
@@ -420,85 +626,82 @@ def get_undelivered_orders(due_date: date=None, order_date_from: date=None, orde
         # Search Term
         elif search_term:
             result = session.execute(
-                text(
-                    """
-                    SELECT 
-                        *
-                    FROM 
-                        v_orders
-                    WHERE
-                        is_delivered = false
-                        AND 
-                        (order_no ILIKE :search_term
-                        OR customer_serial_no ILIKE :search_term
-                        OR customer_name ILIKE :search_term
-                        OR customer_phone ILIKE :search_term
-                        OR customer_city ILIKE :search_term
-                        OR customer_state_region ILIKE :search_term
-                        OR customer_country ILIKE :search_term
-                        OR payment_type_name ILIKE :search_term
-                        OR delivery_address ILIKE :search_term)
-                    ORDER BY 
-                        delivery_date ASC;
-                    """
-                ),
-                {
-                    "search_term": f"%{search_term}%"
-                }
+                text(_delivery_queue_sql(search.order_search_condition("o"))),
+                search.search_params(search_term)
             )
 
         else:
+            result = statements.execute(session, _undelivered_due_statement, {"due_date": today})
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+def deliver_orders(ids: list, delivery_date: date):
+    # marks many orders delivered in one statement; ids already delivered are left alone
+    with postgresql.session as session:
+        try:
             result = session.execute(
                 text(
                     """
-                    SELECT 
-                        * 
-                    FROM 
-                        v_orders
+                    UPDATE 
+                        orders
+                    SET
+                        is_delivered = true,
+                        delivery_date = :delivery_date
                     WHERE
-                        is_delivered = false
-                        AND delivery_date <= :today
-                    ORDER BY 
-                        delivery_date ASC;
+                        id = ANY(:ids)
+                        AND NOT is_delivered
+                    RETURNING id;
                     """
-                ),
+                ), 
                 {
-                    "today": today
+                    "ids": [int(id) for id in ids], 
+                    "delivery_date": delivery_date
                 }
             )
+            updated_ids = result.scalars().all()
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        return df
+            session.commit()
+            query_cache.bump_tables("orders")
+            return {"success": True, "ids": updated_ids}
+        except Exception as e:
+            print("Error occurred while delivering orders: ", e)
+            session.rollback()
+            return {"success": False, "error": e}
 
 
-def update_delivery_status(id: int, is_delivered: bool, delivery_date: date):
+def reschedule_deliveries(ids: list, delivery_date: date):
+    # moves the due date of many undelivered orders in one statement
     with postgresql.session as session:
         try:
-            session.execute(
+            result = session.execute(
                 text(
                     """
                     UPDATE 
                         orders
                     SET
-                        is_delivered = :is_delivered,
                         delivery_date = :delivery_date
                     WHERE
-                        id = :id;
+                        id = ANY(:ids)
+                        AND NOT is_delivered
+                    RETURNING id;
                     """
                 ), 
                 {
-                    "id": id, 
-                    "is_delivered": is_delivered,
+                    "ids": [int(id) for id in ids], 
                     "delivery_date": delivery_date
                 }
             )
-            
+            updated_ids = result.scalars().all()
+
             session.commit()
-            return True
+            query_cache.bump_tables("orders")
+            return {"success": True, "ids": updated_ids}
         except Exception as e:
-            print("Error occurred while updating an order: ", e)
+            print("Error occurred while rescheduling orders: ", e)
             session.rollback()
-            return False
+            return {"success": False, "error": e}
 
 
 def get_delivered_orders(from_date: date, to_date: date, search_term: str=None):
@@ -507,7 +710,7 @@ def get_delivered_orders(from_date: date, to_date: date, search_term: str=None):
         if search_term:
             result = session.execute(
                 text(
-                    """
+                    f"""
                     SELECT 
                         o.delivery_date,
                         o.date,
@@ -524,22 +727,12 @@ def get_delivered_orders(from_date: date, to_date: date, search_term: str=None):
                     WHERE
                         o.is_delivered = true
                         AND 
-                        (o.order_no ILIKE :search_term
-                        OR o.customer_serial_no ILIKE :search_term
-                        OR o.customer_name ILIKE :search_term
-                        OR o.customer_phone ILIKE :search_term
-                        OR o.customer_city ILIKE :search_term
-                        OR o.customer_state_region ILIKE :search_term
-                        OR o.customer_country ILIKE :search_term
-                        OR o.payment_type_name ILIKE :search_term
-                        OR o.delivery_address ILIKE :search_term)
+                        {search.order_search_condition("o")}
                     ORDER BY 
                         o.delivery_date ASC, o.id;
                     """
                 ),
-                {
-                    "search_term": f"%{search_term}%"
-                }
+                search.search_params(search_term)
             )
 
         # Date Range
@@ -574,5 +767,5 @@ def get_delivered_orders(from_date: date, to_date: date, search_term: str=None):
                 }
             )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
@@ -0,0 +1,51 @@
+import threading
+from functools import wraps
+from cachetools import TTLCache
+
+# Process-wide cache for read functions, shared by every Streamlit session.
+# Each entry remembers the version of the tables it was read from; write functions
+# call bump_tables() after commit, so an entry read before a write is never served again.
+
+_lock = threading.RLock()
+_table_versions = {}
+
+
+def bump_tables(*tables: str):
+    with _lock:
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def version_stamp(tables: tuple):
+    with _lock:
+        return tuple(_table_versions.get(table, 0) for table in tables)
+
+
+def cached_query(tables: tuple, ttl: int=600, maxsize: int=32):
+    def decorator(func):
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            # stamp taken before the read: a write that lands mid-query leaves this entry stale
+            stamp = version_stamp(tables)
+
+            with _lock:
+                entry = cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                return entry[1].copy()
+
+            df = func(*args, **kwargs)
+            with _lock:
+                cache[key] = (stamp, df)
+            return df.copy()
+
+        def cache_clear():
+            with _lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
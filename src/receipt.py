@@ -0,0 +1,44 @@
+import os
+import streamlit as st
+from datetime import date, datetime
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+# Order receipts rendered from templates/receipt.html. The template is compiled once per
+# process; a batch of receipts renders into one 80mm document, one receipt per page.
+
+_template_dir = os.path.join(os.path.dirname(__file__), "templates")
+
+
+def _money(n):
+    return f"{n:,.0f}"
+
+
+def _receipt_date(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%d-%m-%Y")
+    return date.fromisoformat(str(value)[:10]).strftime("%d-%m-%Y")
+
+
+@st.cache_resource
+def get_receipt_template():
+    environment = Environment(
+        loader=FileSystemLoader(_template_dir),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    environment.filters["money"] = _money
+    environment.filters["receipt_date"] = _receipt_date
+    return environment.get_template("receipt.html")
+
+
+def build_receipt_html(order: dict, items: list):
+    return build_receipts_html([(order, items)])
+
+
+def build_receipts_html(receipts: list):
+    # receipts: [(order, items), ...] -> one print document
+    return get_receipt_template().render(
+        receipts=[{"order": order, "items": items} for order, items in receipts]
+    )
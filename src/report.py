@@ -1,14 +1,15 @@
 import streamlit as st
-import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from sqlalchemy import text, bindparam
 import src.utils as utils
+import src.query_cache as query_cache
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+postgresql = utils.get_postgresql_connection()
 
 
+@query_cache.cached_query(tables=("orders", "order_items", "customers", "payment_types", "stock_categories"))
 def get_orders(from_date: date, to_date: date):
     with postgresql.session as session:
         result = session.execute(
@@ -28,9 +29,10 @@ def get_orders(from_date: date, to_date: date):
             }
         )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
 
+@query_cache.cached_query(tables=("expenses", "expense_types"))
 def get_expenses(from_date: date, to_date: date):
     with postgresql.session as session:
         result = session.execute(
@@ -53,5 +55,138 @@ def get_expenses(from_date: date, to_date: date):
             }
         )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
         return df
+
+
+@query_cache.cached_query(tables=("daily_sales_summary", "payment_types", "stock_categories"))
+def get_daily_sales_summary(from_date: date, to_date: date, by_stock_category: bool=False):
+    # by_stock_category=False: order-level rows (orders, paid amount, discount, delivery charges)
+    # by_stock_category=True: item-level rows (quantity, amount per stock category)
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                """
+                SELECT
+                    s.date,
+                    s.payment_type_id,
+                    pt.name AS payment_type_name,
+                    s.stock_category_id,
+                    sc.name AS stock_category_name,
+                    s.orders,
+                    s.quantity,
+                    s.amount,
+                    s.paid_amount,
+                    s.discount,
+                    s.delivery_charges
+                FROM 
+                    daily_sales_summary AS s
+                    LEFT JOIN payment_types AS pt ON pt.id = s.payment_type_id
+                    LEFT JOIN stock_categories AS sc ON sc.id = s.stock_category_id
+                WHERE 
+                    s.date BETWEEN :from_date AND :to_date
+                    AND (s.stock_category_id IS NOT NULL) = :by_stock_category
+                ORDER BY
+                    s.date;
+                """
+            ),
+            {
+                "from_date": from_date,
+                "to_date": to_date,
+                "by_stock_category": by_stock_category
+            }
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+# Month x payment type / month x expense type totals, aggregated by Postgres.
+# SUM() over a bigint column returns numeric (Decimal in pandas), so it is cast back.
+@query_cache.cached_query(tables=("daily_sales_summary", "payment_types"))
+def get_monthly_income(from_date: date, to_date: date):
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                """
+                SELECT
+                    EXTRACT(MONTH FROM date_trunc('month', s.date))::integer AS month,
+                    s.payment_type_id,
+                    pt.name AS payment_type_name,
+                    SUM(s.paid_amount)::bigint AS paid_amount
+                FROM
+                    daily_sales_summary AS s
+                    LEFT JOIN payment_types AS pt ON pt.id = s.payment_type_id
+                WHERE
+                    s.date BETWEEN :from_date AND :to_date
+                    AND s.stock_category_id IS NULL
+                GROUP BY
+                    date_trunc('month', s.date), s.payment_type_id, pt.name
+                ORDER BY
+                    month, payment_type_name;
+                """
+            ),
+            {
+                "from_date": from_date,
+                "to_date": to_date
+            }
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+@query_cache.cached_query(tables=("expenses", "expense_types"))
+def get_monthly_expenses(from_date: date, to_date: date):
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                """
+                SELECT
+                    EXTRACT(MONTH FROM date_trunc('month', date))::integer AS month,
+                    expense_type_id,
+                    expense_type_name,
+                    SUM(amount) AS amount
+                FROM
+                    v_expenses
+                WHERE
+                    date BETWEEN :from_date AND :to_date
+                GROUP BY
+                    date_trunc('month', date), expense_type_id, expense_type_name
+                ORDER BY
+                    month, expense_type_name;
+                """
+            ),
+            {
+                "from_date": from_date,
+                "to_date": to_date
+            }
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+# Concurrent loading of independent report datasets. Each query runs on its own worker
+# thread, and each thread checks out its own pooled connection (postgresql.session opens
+# a new session per access), so a page waits for the slowest query, not the sum of them.
+_loader = ThreadPoolExecutor(max_workers=6, thread_name_prefix="report_loader")
+
+
+def _timed(func, args):
+    started = time.perf_counter()
+    try:
+        return {"data": func(*args), "error": None, "seconds": time.perf_counter() - started}
+    except Exception as e:
+        # one failing query does not take the other datasets down with it
+        print(f"Error occurred while loading {func.__name__}: ", e)
+        return {"data": None, "error": e, "seconds": time.perf_counter() - started}
+
+
+def load_concurrently(queries: dict):
+    # queries: {name: (func, *args)} -> {name: {"data": df | None, "error": exception | None, "seconds": float}}
+    futures = {
+        name: _loader.submit(_timed, query[0], query[1:])
+        for name, query in queries.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
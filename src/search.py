@@ -0,0 +1,39 @@
+# Search over the trigram-indexed search_document columns (sql/002_search_documents.sql).
+# Callers embed the returned SQL fragments in their own queries and merge search_params()
+# into their bind parameters.
+
+
+def _escape_like(term: str):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_params(search_term: str):
+    term = search_term.strip().lower()
+    return {
+        "search_term": f"%{_escape_like(term)}%",
+        "search_rank_term": term
+    }
+
+
+def order_search_condition(alias: str=""):
+    prefix = f"{alias}." if alias else ""
+    return f"{prefix}id IN (SELECT id FROM orders WHERE search_document ILIKE :search_term)"
+
+
+def customer_search_condition(alias: str=""):
+    prefix = f"{alias}." if alias else ""
+    return f"{prefix}search_document ILIKE :search_term"
+
+
+def customer_search_rank(alias: str=""):
+    prefix = f"{alias}." if alias else ""
+    return f"word_similarity(:search_rank_term, {prefix}search_document)"
+
+
+def prefix_params(search_term: str):
+    # for prefix lookups (LIKE 'term%') on lower-cased, text_pattern_ops indexed columns
+    term = search_term.strip().lower()
+    return {
+        "prefix_term": f"{_escape_like(term)}%",
+        "exact_term": term
+    }
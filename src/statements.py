@@ -0,0 +1,70 @@
+import re
+import threading
+from sqlalchemy import text
+
+# Registry of named statements, compiled once at import time by the src modules.
+# Statements registered with prepare=True run as server-side prepared statements:
+# the first execution on a pooled connection PREPAREs it, later ones only EXECUTE,
+# so Postgres skips parsing and planning (generic plans) on the hot paths.
+
+_param_pattern = re.compile(r"(?<![:\w]):(\w+)")
+
+_lock = threading.Lock()
+_registry = {}
+_stats = {}
+
+
+class Statement:
+    def __init__(self, name: str, sql: str, prepare: bool=False):
+        self.name = name
+        self.clause = text(sql)
+        self.prepare = prepare
+
+        if prepare:
+            self.param_names = list(dict.fromkeys(_param_pattern.findall(sql)))
+            positional = _param_pattern.sub(lambda m: f"${self.param_names.index(m.group(1)) + 1}", sql)
+            self.prepare_sql = text(f"PREPARE {name} AS {positional.strip().rstrip(';')};")
+            args = ", ".join(f":{p}" for p in self.param_names)
+            self.execute_clause = text(f"EXECUTE {name}({args});" if args else f"EXECUTE {name};")
+
+
+def register(name: str, sql: str, prepare: bool=False):
+    # re-registering (a src module reloaded by Streamlit) keeps the existing statement and stats
+    with _lock:
+        if name in _registry and _registry[name].clause.text == sql:
+            return _registry[name]
+        statement = Statement(name, sql, prepare)
+        _registry[name] = statement
+        _stats.setdefault(name, {"executions": 0, "prepares": 0, "plan_cache_hits": 0})
+        return statement
+
+
+def execute(session, statement: Statement, params: dict=None):
+    params = params or {}
+    if not statement.prepare:
+        with _lock:
+            _stats[statement.name]["executions"] += 1
+        return session.execute(statement.clause, params)
+
+    # prepared statements live as long as the DBAPI connection; the pool clears
+    # connection.info when it invalidates or recycles the connection
+    connection = session.connection()
+    prepared = connection.connection.info.setdefault("prepared_statements", {})
+    hit = prepared.get(statement.name) is statement
+    if not hit:
+        if statement.name in prepared:
+            # registered again with different SQL since this connection prepared it
+            connection.execute(text(f"DEALLOCATE {statement.name};"))
+        connection.execute(statement.prepare_sql)
+        prepared[statement.name] = statement
+
+    with _lock:
+        _stats[statement.name]["executions"] += 1
+        _stats[statement.name]["plan_cache_hits" if hit else "prepares"] += 1
+
+    return session.execute(statement.execute_clause, {p: params[p] for p in statement.param_names})
+
+
+def get_statement_stats():
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
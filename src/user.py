@@ -1,11 +1,9 @@
 import streamlit as st
-import pandas as pd
 from sqlalchemy import text, bindparam
 import src.utils as utils
+import src.query_cache as query_cache
 
-if "postgresql" not in st.session_state:
-    st.session_state["postgresql"] = utils.get_postgresql_connection()
-postgresql = st.session_state["postgresql"]
+postgresql = utils.get_postgresql_connection()
 
 def get_users():
     with postgresql.session as session:
@@ -27,5 +25,49 @@ def get_users():
             )
         )
 
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+def get_user_by_name(user_name: str):
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                """
+                SELECT 
+                    u.id AS user_id,
+                    u.user_name,
+                    u.password,
+                    u.role_id
+                FROM 
+                    users AS u
+                WHERE
+                    u.user_name = :user_name;
+                """
+            ),
+            {"user_name": user_name}
+        )
+
+        df = utils.fetch_dataframe(result)
+        return df
+
+
+@query_cache.cached_query(tables=("roles", "role_permissions"), ttl=3600)
+def get_role_permissions():
+    with postgresql.session as session:
+        result = session.execute(
+            text(
+                """
+                SELECT 
+                    r.id AS role_id,
+                    r.name AS role_name,
+                    rp.permissions
+                FROM 
+                    roles AS r
+                    INNER JOIN role_permissions AS rp ON r.id = rp.role_id;
+                """
+            )
+        )
+
+        df = utils.fetch_dataframe(result)
         return df
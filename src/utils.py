@@ -1,14 +1,149 @@
 import streamlit as st
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import threading
+import time
 from datetime import datetime
+from sqlalchemy.pool import QueuePool
 import bcrypt
 
+# Pool settings, overridable from the [postgresql_pool] section of .streamlit/secrets.toml
+_pool_defaults = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "statement_timeout_ms": 30000
+}
+
+_pool_stats_lock = threading.Lock()
+_pool_stats = {
+    "checkouts": 0,
+    "waits": 0,
+    "wait_seconds": 0.0,
+    "overflow_events": 0
+}
+
+
+def get_pool_settings():
+    settings = dict(_pool_defaults)
+    settings.update(st.secrets.get("postgresql_pool", {}))
+    return settings
+
+
+class InstrumentedQueuePool(QueuePool):
+    # counts checkouts that had to open an overflow connection or wait for a free one
+    def __init__(self, creator, pool_size: int=5, max_overflow: int=10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.max_overflow_setting = max_overflow
+
+    def connect(self):
+        no_idle = self.checkedin() == 0
+        waiting = no_idle and self.max_overflow_setting >= 0 and self.overflow() >= self.max_overflow_setting
+        overflowing = no_idle and not waiting and self.overflow() >= 0
+
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            with _pool_stats_lock:
+                _pool_stats["checkouts"] += 1
+                if waiting:
+                    _pool_stats["waits"] += 1
+                    _pool_stats["wait_seconds"] += time.perf_counter() - started
+                elif overflowing:
+                    _pool_stats["overflow_events"] += 1
+
+
 @st.cache_resource
 def get_postgresql_connection():
-    conn = st.connection(name="postgresql_production", type="sql")
+    # one engine (and pool) per process, shared by every session
+    settings = get_pool_settings()
+    conn = st.connection(
+        name="postgresql_production", 
+        type="sql",
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        pool_recycle=settings["pool_recycle"],
+        connect_args={"options": f"-c statement_timeout={int(settings['statement_timeout_ms'])}"}
+    )
     return conn
+
+
+def get_pool_stats():
+    pool = get_postgresql_connection().engine.pool
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+
+    stats.update({
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0)
+    })
+    return stats
     
 
+def _to_arrow(values):
+    # json/jsonb columns (dicts, lists) and mixed-type columns stay as Python objects
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, (dict, list)):
+        return None
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+
+def fetch_dataframe(result, batch_size: int=10000):
+    # Reads the DBAPI cursor in batches straight into per-column Arrow buffers,
+    # skipping the per-record SQLAlchemy Row objects of result.fetchall().
+    columns = list(result.keys())
+    cursor = getattr(result, "cursor", None)
+    fetchmany = cursor.fetchmany if cursor is not None else result.fetchmany
+
+    batches = []
+    while True:
+        rows = fetchmany(batch_size)
+        if not rows:
+            break
+        batches.append(list(zip(*rows)))
+    result.close()
+
+    if not batches:
+        return pd.DataFrame(columns=columns)
+
+    arrow_arrays, object_columns = {}, {}
+    for idx, name in enumerate(columns):
+        chunks = [_to_arrow(batch[idx]) for batch in batches]
+        if all(chunk is not None for chunk in chunks) and len({chunk.type for chunk in chunks}) == 1:
+            arrow_arrays[name] = pa.chunked_array(chunks)
+            continue
+
+        # a column can change inferred type between batches (e.g. an all-NULL batch)
+        values = [v for batch in batches for v in batch[idx]]
+        array = _to_arrow(values)
+        if array is not None:
+            arrow_arrays[name] = array
+        else:
+            object_columns[name] = values
+    del batches
+
+    if arrow_arrays:
+        df = pa.table(arrow_arrays).to_pandas(split_blocks=True, self_destruct=True)
+    else:
+        df = pd.DataFrame(index=pd.RangeIndex(len(next(iter(object_columns.values())))))
+    for name, values in object_columns.items():
+        df[name] = pd.Series(values, dtype=object, index=df.index)
+
+    return df[columns] if object_columns else df
+
+
 def percentage_change(current, previous):
     return ((current - previous) / previous * 100) if previous else 100
 
@@ -28,99 +163,15 @@ def confirmation_dialog(msg: str, yes_button_txt: str, no_button_txt: str):
             st.rerun()
 
 
-def build_receipt_html(order: dict, items: list):
-    def fmt(n):
-        return f"{n:,.0f}"
-
-    items_rows = """
-    <tr>
-        <td style="text-align: left;">Description</td>
-        <td style="text-align: right;">Quantity</td>
-        <td style="text-align: right;">Amount</td>
-    </tr>
-    """
-    
-    for item in items:
-        items_rows += f"""
-        <tr>
-            <td>
-                {item['stock_category_name']}<br>
-                {item['description']}
-            </td>
-            <td style="text-align: right;">{item['quantity']}</td>
-            <td style="text-align: right;">{fmt(item['amount'])}</td>
-        </tr>
-        """
-
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Order Receipt</title>
-        <style>
-        @page {{ 
-            size: 80mm auto; 
-            margin: 4mm; 
-        }}
-        body {{
-            font-family: Arial, sans-serif;
-            width: 80mm;
-            margin: 0;
-            padding: 4px;
-        }}
-        h2 {{ 
-            text-align: center; 
-            margin-bottom: 4px; 
-        }}
-        p {{
-            line-height: 1.5;
-        }}
-        table {{ 
-            width: 100%; 
-            font-size: 12px; 
-            border-collapse: separate;
-            border-spacing: 0 1em;
-        }}
-        td {{ 
-            padding: 2px 0;
-        }}
-        .totals {{ 
-            text-align: right; 
-            margin-top: 8px; 
-            font-weight: bold; 
-        }}
-        </style>
-    </head>
-    <body onload="window.print(); window.close();">
-        <h2>AP Collections</h2>
-        <div style="text-align: center; font-size: 11px;">Mandalay, Myanmar<br>Tel: +95 9 974568557</div>
-      
-        <p>
-            <b>Date:</b> {datetime.strptime(str(order['date']), "%Y-%m-%d").strftime('%d-%m-%Y')}<br>
-            <b>Order No:</b> {order['order_no']}<br>
-            <b>Customer:</b> {order['customer_serial_no']} {order['customer_name']}
-        </p>
-      
-        <table>
-            {items_rows}
-        </table>
-
-        <hr>
-        <p>
-            Total Quantity: {order['ttl_quantity']}<br>
-            Total Amount: {fmt(order['ttl_amount'])}<br>
-            Discount: {fmt(order['discount'])}<br>
-            Delivery: {fmt(order['delivery_charges'])}<br>
-            Paid Amount: {fmt(order['paid_amount'])}
-        </p>
-
-        <p style="text-align: center; font-size: 11px;">
-            Thank you and have a nice day!
-        </p>
-    </body>
-    </html>
-    """
-    return html
+def is_unique_violation(e: Exception, index_name: str=None):
+    # a write rejected by a unique index (SQLSTATE 23505), optionally by a specific one
+    orig = getattr(e, "orig", None)
+    if getattr(orig, "pgcode", None) != "23505":
+        return False
+    if index_name is None:
+        return True
+    diag = getattr(orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == index_name
 
 
 def hash_password(pwd: str):